@@ -0,0 +1,131 @@
+import asyncio
+import inspect
+import logging
+import sys
+from typing import Awaitable, Callable, Optional, Union
+
+from .command_parameters import CommandParameters
+from .output_handler_interface import OutputHandlerInterface
+
+# Longest output line read at once; longer lines are split
+STREAM_LIMIT = 1024 * 1024
+
+MessageCallback = Callable[[str], Union[None, Awaitable[None]]]
+
+
+async def execute_command_async(
+    params: CommandParameters,
+    output_handler: OutputHandlerInterface,
+    timeout: Optional[float] = None,
+) -> Optional[int]:
+    """
+    Executes a command as an asyncio subprocess, reading stdout and stderr at
+    the same time so that neither stream can fill up while the other is idle.
+    Many commands can run concurrently on one event loop.
+
+    The handler's methods may be plain functions or coroutines. If the task is
+    cancelled, the process is killed and the cancellation propagates.
+
+    :param params: The command to execute.
+    :param output_handler: Receives the output and error messages.
+    :param timeout: Optional number of seconds after which the process is killed.
+    :return: The exit code of the process, or None if it could not be started.
+    """
+    command = params.get_command_list()
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.PIPE if params.interactive else None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=STREAM_LIMIT,
+        )
+    except Exception as e:
+        print(f"An error occurred: {str(e)}", file=sys.stderr)
+        logging.error(f"An error occurred: {str(e)}")
+        return None
+
+    try:
+        await asyncio.wait_for(
+            _handle_process(process, params, output_handler), timeout
+        )
+    except asyncio.TimeoutError:
+        logging.error(f"Command {command} timed out after {timeout}s")
+        await call_handler(
+            output_handler.handle_error, f"Command timed out after {timeout}s"
+        )
+    except Exception as e:
+        print(f"An error occurred: {str(e)}", file=sys.stderr)
+        logging.error(f"An error occurred: {str(e)}")
+    finally:
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+    return process.returncode
+
+
+async def _handle_process(
+    process: asyncio.subprocess.Process,
+    params: CommandParameters,
+    output_handler: OutputHandlerInterface,
+) -> None:
+    if not (params.interactive or params.real_time):
+        stdout, stderr = await process.communicate()
+        if stdout:
+            await call_handler(
+                output_handler.handle_output, stdout.decode(errors="replace")
+            )
+        if stderr:
+            await call_handler(
+                output_handler.handle_error, stderr.decode(errors="replace")
+            )
+        return
+
+    async def on_output(message: str) -> None:
+        await call_handler(output_handler.handle_output, message)
+        if params.interactive and "Please enter" in message:
+            await _answer_prompt(process)
+
+    await asyncio.gather(
+        _pump_lines(process.stdout, on_output),
+        _pump_lines(
+            process.stderr,
+            lambda message: call_handler(output_handler.handle_error, message),
+        ),
+    )
+    await process.wait()
+
+
+async def _pump_lines(
+    stream: asyncio.StreamReader, on_line: Callable[[str], Awaitable[None]]
+) -> None:
+    while True:
+        try:
+            line = await stream.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            line = e.partial
+        except asyncio.LimitOverrunError as e:
+            # Line longer than STREAM_LIMIT: hand over what is buffered
+            line = await stream.read(e.consumed)
+        if not line:
+            break
+        await on_line(line.decode(errors="replace").strip())
+
+
+async def _answer_prompt(process: asyncio.subprocess.Process) -> None:
+    # input() blocks, so it runs in a thread to keep the other commands going
+    user_input = await asyncio.to_thread(input)
+    process.stdin.write((user_input + "\n").encode())
+    await process.stdin.drain()
+
+
+async def call_handler(callback: MessageCallback, message: str) -> None:
+    """
+    Calls an output handler method, awaiting it if it is a coroutine.
+    """
+    result = callback(message)
+    if inspect.isawaitable(result):
+        await result
@@ -0,0 +1,152 @@
+import asyncio
+import os
+import time
+from typing import AsyncIterator, Iterable, List, Optional
+
+from .async_command_executor import call_handler, execute_command_async
+from .command_parameters import CommandParameters
+from .output_handler_interface import OutputHandlerInterface
+
+DEFAULT_MAX_CONCURRENCY = os.cpu_count() or 4
+RESULT_ORDERS = ("submission", "completion")
+
+
+class CommandResult:
+    def __init__(self, index: int, params: CommandParameters):
+        """
+        Outcome of one command of a batch.
+
+        :param index: Position of the command in the batch.
+        :param params: The command.
+        """
+        self.index = index
+        self.params = params
+        self.return_code: Optional[int] = None
+        self.output: List[str] = []
+        self.errors: List[str] = []
+        self.duration = 0.0
+
+    @property
+    def success(self) -> bool:
+        return self.return_code == 0
+
+    def __repr__(self):
+        return (
+            f"CommandResult(index={self.index}, "
+            f"command={self.params.get_command_list()}, "
+            f"return_code={self.return_code}, duration={self.duration:.2f}s)"
+        )
+
+
+class TaggedOutputHandler(OutputHandlerInterface):
+    def __init__(
+        self,
+        result: CommandResult,
+        output_handler: Optional[OutputHandlerInterface] = None,
+    ):
+        """
+        Collects the messages of one command into its result and forwards them,
+        prefixed with the command's index, to a handler shared by the batch.
+
+        :param result: The result of the command.
+        :param output_handler: Optional shared handler.
+        """
+        self.result = result
+        self.output_handler = output_handler
+
+    async def handle_output(self, message: str) -> None:
+        self.result.output.append(message)
+        if self.output_handler is not None:
+            await call_handler(
+                self.output_handler.handle_output, f"[{self.result.index}] {message}"
+            )
+
+    async def handle_error(self, message: str) -> None:
+        self.result.errors.append(message)
+        if self.output_handler is not None:
+            await call_handler(
+                self.output_handler.handle_error, f"[{self.result.index}] {message}"
+            )
+
+
+async def iter_command_results(
+    list_of_params: Iterable[CommandParameters],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    output_handler: Optional[OutputHandlerInterface] = None,
+    order: str = "completion",
+    timeout: Optional[float] = None,
+) -> AsyncIterator[CommandResult]:
+    """
+    Runs commands on the event loop, at most ``max_concurrency`` at a time, and
+    yields their results. Commands still running when the iteration stops early
+    are cancelled and their processes killed.
+
+    :param list_of_params: The commands.
+    :param max_concurrency: Maximum number of commands running at the same time.
+    :param output_handler: Optional handler receiving every message, prefixed
+        with the index of its command.
+    :param order: 'completion' to yield results as commands finish, or
+        'submission' to yield them in the order of ``list_of_params``.
+    :param timeout: Optional number of seconds after which a command is killed.
+    :return: Async iterator over the results.
+    """
+    if order not in RESULT_ORDERS:
+        raise ValueError(f"Unknown order '{order}', expected one of {RESULT_ORDERS}")
+    slots = asyncio.Semaphore(max_concurrency)
+
+    async def run(result: CommandResult) -> CommandResult:
+        async with slots:
+            started = time.monotonic()
+            result.return_code = await execute_command_async(
+                result.params, TaggedOutputHandler(result, output_handler), timeout
+            )
+            result.duration = time.monotonic() - started
+        return result
+
+    tasks = [
+        asyncio.create_task(run(CommandResult(index, params)))
+        for index, params in enumerate(list_of_params)
+    ]
+    try:
+        if order == "submission":
+            for task in tasks:
+                yield await task
+        else:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def execute_commands(
+    list_of_params: Iterable[CommandParameters],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    output_handler: Optional[OutputHandlerInterface] = None,
+    order: str = "submission",
+    timeout: Optional[float] = None,
+) -> List[CommandResult]:
+    """
+    Executes a batch of commands concurrently on a new event loop. Interactive
+    commands should be run with ``max_concurrency=1``, since their prompts share
+    the console.
+
+    :param list_of_params: The commands.
+    :param max_concurrency: Maximum number of commands running at the same time.
+    :param output_handler: Optional handler receiving every message, prefixed
+        with the index of its command.
+    :param order: 'submission' or 'completion' order of the returned results.
+    :param timeout: Optional number of seconds after which a command is killed.
+    :return: The results.
+    """
+
+    async def collect() -> List[CommandResult]:
+        return [
+            result
+            async for result in iter_command_results(
+                list_of_params, max_concurrency, output_handler, order, timeout
+            )
+        ]
+
+    return asyncio.run(collect())
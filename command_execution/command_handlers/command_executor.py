@@ -6,6 +6,7 @@ import logging
 
 from .command_parameters import CommandParameters
 from .output_handler_interface import OutputHandlerInterface
+from .pty_command_executor import handle_pty_process
 
 
 # config = configparser.ConfigParser()
@@ -29,7 +30,9 @@ def execute_command(
     """
     command = params.get_command_list()
     try:
-        if params.interactive:
+        if params.interactive and params.use_pty:
+            handle_pty_process(command, output_handler, params.prompts, params.timeout)
+        elif params.interactive:
             process = subprocess.Popen(
                 command,
                 stdin=subprocess.PIPE,
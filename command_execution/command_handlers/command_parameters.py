@@ -1,4 +1,7 @@
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from .pty_command_executor import PromptRule
 
 
 class CommandParameters:
@@ -9,6 +12,9 @@ class CommandParameters:
         options: Optional[Dict[str, Optional[str]]] = None,
         real_time: bool = False,
         interactive: bool = False,
+        use_pty: bool = False,
+        prompts: Optional[List["PromptRule"]] = None,
+        timeout: Optional[float] = None,
     ):
         """
         Initializes the command parameters.
@@ -18,12 +24,21 @@ class CommandParameters:
         :param options: Dictionary of options or flags for the command.
         :param real_time: Boolean indicating if the output should be in real-time.
         :param interactive: Boolean indicating if the command requires interactive input.
+        :param use_pty: Boolean indicating if an interactive command runs in a
+            pseudo-terminal, so that prompts without a newline are detected.
+        :param prompts: Prompt rules answering an interactive command run in a
+            pseudo-terminal; by default the user is asked.
+        :param timeout: Optional number of seconds after which a command run in
+            a pseudo-terminal is killed.
         """
         self.executable = executable
         self.args = args if args else []
         self.options = options if options else {}
         self.real_time = real_time
         self.interactive = interactive
+        self.use_pty = use_pty
+        self.prompts = prompts
+        self.timeout = timeout
 
     def get_command_list(self) -> List[str]:
         """
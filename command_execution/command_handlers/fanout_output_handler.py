@@ -0,0 +1,202 @@
+import asyncio
+import inspect
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from .output_handler_interface import OutputHandlerInterface
+
+SINK_POLICIES = ("block", "drop_oldest", "sample")
+DEFAULT_QUEUE_SIZE = 1000
+# With the 'sample' policy, one message out of this many is kept while full
+DEFAULT_SAMPLE_EVERY = 10
+
+_STOP = object()
+
+
+class OutputSink:
+    def __init__(
+        self,
+        handler: OutputHandlerInterface,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        policy: str = "drop_oldest",
+        sample_every: int = DEFAULT_SAMPLE_EVERY,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        name: Optional[str] = None,
+    ):
+        """
+        Feeds a handler from its own thread through a bounded queue.
+
+        When the queue is full, the policy decides what happens to a new
+        message: 'block' waits for room (nothing is lost, but the producer is
+        slowed down), 'drop_oldest' discards the oldest queued message and
+        'sample' keeps one new message out of ``sample_every`` in place of the
+        oldest and drops the others.
+
+        :param handler: The handler; its methods may be coroutines.
+        :param queue_size: Maximum number of queued messages.
+        :param policy: 'drop_oldest' (the default), 'block' or 'sample'.
+        :param sample_every: With 'sample', keep one message out of this many
+            while the queue is full.
+        :param loop: Optional running event loop the handler's coroutines must
+            run on, e.g. the loop owning a websocket; otherwise they run on a
+            loop of the sink's thread.
+        :param name: Name of the sink, used in logs.
+        """
+        if policy not in SINK_POLICIES:
+            raise ValueError(
+                f"Unknown policy '{policy}', expected one of {SINK_POLICIES}"
+            )
+        self.handler = handler
+        self.policy = policy
+        self.sample_every = max(1, sample_every)
+        self.loop = loop
+        self.name = name or type(handler).__name__
+        self.dropped = 0
+        self._overflows = 0
+        self._queue: "queue.Queue[Union[Tuple[bool, str], object]]" = queue.Queue(
+            queue_size
+        )
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name=f"output-sink-{self.name}", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, message: str, is_error: bool = False):
+        """
+        Queues a message according to the sink's policy.
+
+        :param message: The message.
+        :param is_error: Whether it goes to ``handle_error``.
+        """
+        item = (is_error, message)
+        if self.policy == "block":
+            self._queue.put(item)
+            return
+        with self._lock:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                pass
+            if self.policy == "sample":
+                self._overflows += 1
+                if self._overflows % self.sample_every:
+                    self.dropped += 1
+                    return
+            try:
+                self._queue.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+            self._queue.put_nowait(item)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Lets the thread handle the queued messages, then stops it.
+
+        :param timeout: Optional number of seconds to wait for the thread.
+        :return: Whether the thread has stopped; if not, it is still handling
+            messages and the handler must not be closed.
+        """
+        if self._thread.is_alive():
+            deadline = None if timeout is None else time.monotonic() + timeout
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            else:
+                self._thread.join(
+                    None if deadline is None else max(0, deadline - time.monotonic())
+                )
+        if self.dropped:
+            logging.warning(f"Output sink {self.name} dropped {self.dropped} messages")
+        if self._thread.is_alive():
+            logging.warning(f"Output sink {self.name} did not stop within {timeout}s")
+            return False
+        return True
+
+    def _run(self):
+        # Created on the first coroutine and reused for all of them
+        private_loop: Optional[asyncio.AbstractEventLoop] = None
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                is_error, message = item
+                callback = (
+                    self.handler.handle_error
+                    if is_error
+                    else self.handler.handle_output
+                )
+                try:
+                    result = callback(message)
+                    if inspect.isawaitable(result):
+                        if self.loop is not None:
+                            asyncio.run_coroutine_threadsafe(result, self.loop).result()
+                        else:
+                            private_loop = private_loop or asyncio.new_event_loop()
+                            private_loop.run_until_complete(result)
+                except Exception as e:
+                    logging.error(f"Output sink {self.name} failed: {str(e)}")
+        finally:
+            if private_loop is not None:
+                private_loop.close()
+
+
+class FanOutOutputHandler(OutputHandlerInterface):
+    def __init__(self, sinks: Iterable[Union[OutputSink, OutputHandlerInterface]]):
+        """
+        Sends every message to several handlers (console, file, websocket,
+        metrics...), each fed by its own OutputSink so that a slow handler
+        cannot stall the process reader unless its policy is 'block'.
+
+        Plain handlers are wrapped in a sink with the default settings, i.e. the
+        'drop_oldest' policy. With ``execute_command_async``, avoid the 'block'
+        policy for slow sinks, as it would block the event loop.
+
+        :param sinks: The sinks or handlers.
+        """
+        self.sinks = [
+            sink if isinstance(sink, OutputSink) else OutputSink(sink) for sink in sinks
+        ]
+
+    def handle_output(self, message: str) -> None:
+        for sink in self.sinks:
+            sink.put(message)
+
+    def handle_error(self, message: str) -> None:
+        for sink in self.sinks:
+            sink.put(message, is_error=True)
+
+    @property
+    def dropped(self) -> Dict[str, int]:
+        """
+        Number of messages dropped by each sink.
+        """
+        return {sink.name: sink.dropped for sink in self.sinks}
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Drains and stops every sink, then closes the handlers that have a
+        ``close`` method. The handler of a sink still running after ``timeout``
+        is left open, as its thread may still be using it.
+
+        :param timeout: Optional number of seconds to wait for each sink.
+        """
+        for sink in self.sinks:
+            if not sink.close(timeout):
+                continue
+            close_handler = getattr(sink.handler, "close", None)
+            if close_handler is not None:
+                close_handler()
+
+    def __enter__(self) -> "FanOutOutputHandler":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,11 +1,197 @@
+import gzip
+import os
+import shutil
+import threading
+import weakref
+from typing import BinaryIO, Dict, List, Optional
+
 from .output_handler_interface import OutputHandlerInterface
 
+# Bytes buffered per log file before they are written
+DEFAULT_BUFFER_SIZE = 64 * 1024
+# Seconds after which buffered messages are written even if the buffer is not full
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+class _BufferedLogFile:
+    def __init__(
+        self,
+        path: str,
+        buffer_size: int,
+        max_bytes: Optional[int],
+        backup_count: int,
+        compress: bool,
+    ):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+        self._lock = threading.Lock()
+        self._file: Optional[BinaryIO] = None
+        self._size = 0
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+
+    def write(self, text: str):
+        data = text.encode("utf-8")
+        with self._lock:
+            self._buffer.append(data)
+            self._buffered += len(data)
+            if self._buffered >= self.buffer_size:
+                self._write_buffer()
+
+    def flush(self):
+        with self._lock:
+            self._write_buffer()
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._write_buffer()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _write_buffer(self):
+        if not self._buffer:
+            return
+        data = b"".join(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+        if self._file is None:
+            self._file = open(self.path, "ab")
+            self._size = self._file.tell()
+        if self.max_bytes and self._size and self._size + len(data) > self.max_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._size += len(data)
+
+    def _backup_path(self, number: int) -> str:
+        return f"{self.path}.{number}" + (".gz" if self.compress else "")
+
+    def _rotate(self):
+        # path -> path.1 -> path.2 ... the oldest backup is dropped
+        self._file.close()
+        if self.backup_count > 0:
+            for number in range(self.backup_count - 1, 0, -1):
+                if os.path.exists(self._backup_path(number)):
+                    os.replace(self._backup_path(number), self._backup_path(number + 1))
+            if self.compress:
+                with open(self.path, "rb") as source, gzip.open(
+                    self._backup_path(1), "wb"
+                ) as target:
+                    shutil.copyfileobj(source, target)
+            else:
+                os.replace(self.path, self._backup_path(1))
+        self._file = open(self.path, "wb")
+        self._size = 0
+
 
 class FileOutputHandler(OutputHandlerInterface):
+    def __init__(
+        self,
+        output_path: str = "output_log.txt",
+        error_path: str = "error_log.txt",
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        flush_interval: Optional[float] = DEFAULT_FLUSH_INTERVAL,
+        max_bytes: Optional[int] = None,
+        backup_count: int = 5,
+        compress: bool = False,
+    ):
+        """
+        Appends output and error messages to log files, which stay open. Messages
+        are buffered and written in batches once ``buffer_size`` bytes are
+        pending or ``flush_interval`` seconds have passed, on ``close`` and on
+        exit.
+
+        :param output_path: File receiving the output messages.
+        :param error_path: File receiving the error messages; may be the same.
+        :param buffer_size: Bytes buffered per file before they are written.
+        :param flush_interval: Seconds after which buffered messages are written
+            by a background thread; None to only write full buffers.
+        :param max_bytes: Optional size at which a file is rotated to
+            ``<path>.1``, ``<path>.2``, ...
+        :param backup_count: Number of rotated files kept.
+        :param compress: Whether rotated files are gzip-compressed.
+        """
+        files: Dict[str, _BufferedLogFile] = {}
+        for path in (output_path, error_path):
+            if path not in files:
+                files[path] = _BufferedLogFile(
+                    path, buffer_size, max_bytes, backup_count, compress
+                )
+        self._output = files[output_path]
+        self._error = files[error_path]
+        self._files = list(files.values())
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Writes the buffers on exit, or when the handler is collected unclosed,
+        # without the handler being kept alive until exit
+        weakref.finalize(self, _close_files, self._files, self._stop)
+
     def handle_output(self, message: str) -> None:
-        with open("output_log.txt", "a") as file:
-            file.write(message + "\n")
+        self._ensure_started()
+        self._output.write(message + "\n")
 
     def handle_error(self, message: str) -> None:
-        with open("error_log.txt", "a") as file:
-            file.write("Error: " + message + "\n")
+        self._ensure_started()
+        self._error.write("Error: " + message + "\n")
+
+    def flush(self):
+        """
+        Writes the buffered messages now.
+        """
+        for log_file in self._files:
+            log_file.flush()
+
+    def close(self):
+        """
+        Writes the buffered messages, stops the background thread and closes the
+        files. Messages handled afterwards reopen the files.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+            self._stop.clear()
+        for log_file in self._files:
+            log_file.close()
+
+    def __enter__(self) -> "FileOutputHandler":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _ensure_started(self):
+        if self._thread is not None or not self.flush_interval:
+            return
+        with self._lock:
+            if self._thread is None:
+                # The thread only holds the files, so the handler can be collected
+                self._thread = threading.Thread(
+                    target=_flush_periodically,
+                    args=(self._files, self._stop, self.flush_interval),
+                    name="file-output-flusher",
+                    daemon=True,
+                )
+                self._thread.start()
+
+
+def _flush_periodically(
+    files: List[_BufferedLogFile], stop: threading.Event, interval: float
+):
+    while not stop.wait(interval):
+        for log_file in files:
+            log_file.flush()
+
+
+def _close_files(files: List[_BufferedLogFile], stop: threading.Event):
+    stop.set()
+    for log_file in files:
+        log_file.close()
@@ -2,6 +2,14 @@ from abc import ABC, abstractmethod
 
 
 class OutputHandlerInterface(ABC):
+    """
+    Receives the messages of a subprocess.
+
+    Implementations used with ``execute_command_async`` may define the methods
+    as coroutines (``async def``); they are awaited before the next message of
+    the same stream is read. ``execute_command`` only supports plain methods.
+    """
+
     @abstractmethod
     def handle_output(self, message: str) -> None:
         """
@@ -0,0 +1,215 @@
+import codecs
+import os
+import re
+import select
+import signal
+import subprocess
+import time
+from typing import Callable, List, Match, Optional, Pattern, Sequence, Tuple, Union
+
+try:
+    import pty
+    import termios
+except ImportError:
+    pty = None
+    termios = None
+
+from .output_handler_interface import OutputHandlerInterface
+
+READ_SIZE = 4096
+# Seconds between checks of the timeout while the process is silent
+READ_POLL_INTERVAL = 0.1
+# Characters of unanswered output searched for prompts
+PROMPT_WINDOW = 4096
+
+PromptResponse = Union[str, Callable[[Match], Optional[str]], None]
+
+
+class PromptRule:
+    def __init__(self, pattern: str, response: PromptResponse, once: bool = False):
+        """
+        Answer to a prompt of an interactive command.
+
+        :param pattern: Regular expression of the prompt. It is matched as soon
+            as the text appears, even if the line has no newline yet.
+        :param response: The text to send (a newline is added), or a callback
+            receiving the match and returning the text, or None to not answer.
+        :param once: Whether the rule is dropped after its first match.
+        """
+        self.pattern = pattern
+        self.response = response
+        self.once = once
+
+    def respond(self, match: Match) -> Optional[str]:
+        if callable(self.response):
+            return self.response(match)
+        return self.response
+
+
+# Same behaviour as the pipe-based interactive mode: ask the user
+DEFAULT_PROMPTS = [PromptRule(r"Please enter[^\n]*", lambda match: input())]
+
+
+class PromptMatcher:
+    def __init__(self, rules: Sequence[PromptRule]):
+        """
+        Finds the first prompt in a text with a single compiled alternation of
+        all the rules' patterns, whatever their number.
+
+        :param rules: The rules, in order of priority for prompts at the same
+            position.
+        """
+        self.rules = list(rules)
+        self._compile()
+
+    def _compile(self):
+        self._pattern: Optional[Pattern[str]] = (
+            re.compile(
+                "|".join(
+                    f"(?P<p{index}>{rule.pattern})"
+                    for index, rule in enumerate(self.rules)
+                )
+            )
+            if self.rules
+            else None
+        )
+
+    def search(self, text: str) -> Optional[Tuple[PromptRule, Match]]:
+        """
+        Returns the earliest prompt in the text and its rule, if any. A rule
+        created with ``once`` is dropped when it is returned.
+        """
+        if self._pattern is None:
+            return None
+        match = self._pattern.search(text)
+        if match is None:
+            return None
+        rule = self.rules[int(match.lastgroup[1:])]
+        if rule.once:
+            self.rules.remove(rule)
+            self._compile()
+        return rule, match
+
+
+class _PtySession:
+    def __init__(
+        self,
+        master: int,
+        output_handler: OutputHandlerInterface,
+        matcher: PromptMatcher,
+    ):
+        self.master = master
+        self.output_handler = output_handler
+        self.matcher = matcher
+        self._line = ""
+        self._window = ""
+
+    def feed(self, text: str):
+        self._line += text
+        self._window = (self._window + text)[-PROMPT_WINDOW:]
+        while True:
+            found = self.matcher.search(self._window)
+            if found is None:
+                break
+            rule, match = found
+            self._window = self._window[match.end() :]
+            # Show the prompt even though its line is not finished
+            self._emit_lines(final=True)
+            response = rule.respond(match)
+            if response is not None:
+                os.write(self.master, (response + "\n").encode())
+        self._emit_lines()
+
+    def finish(self):
+        self._emit_lines(final=True)
+
+    def _emit_lines(self, final: bool = False):
+        *lines, self._line = self._line.split("\n")
+        if final and self._line:
+            lines.append(self._line)
+            self._line = ""
+        for line in lines:
+            line = line.strip()
+            if line:
+                self.output_handler.handle_output(line)
+
+
+def handle_pty_process(
+    command: List[str],
+    output_handler: OutputHandlerInterface,
+    prompts: Optional[Sequence[PromptRule]] = None,
+    timeout: Optional[float] = None,
+) -> int:
+    """
+    Runs an interactive command in a pseudo-terminal and answers its prompts.
+
+    In a terminal, the command's output is not block-buffered. Prompts are
+    matched as soon as they are printed, even without a trailing newline. The
+    output is passed to ``handle_output`` line by line. A terminal has a single
+    output stream, so stderr is included there. Responses are not echoed.
+    POSIX only.
+
+    :param command: The command and its arguments.
+    :param output_handler: Receives the output lines.
+    :param prompts: Prompt rules; by default, "Please enter" prompts are
+        answered by the user.
+    :param timeout: Optional number of seconds after which the command is killed.
+    :return: The exit code of the process.
+    :raises subprocess.TimeoutExpired: If the command timed out.
+    """
+    if pty is None:
+        raise OSError("PTY mode requires a POSIX system")
+    master, slave = pty.openpty()
+    attributes = termios.tcgetattr(slave)
+    attributes[3] &= ~termios.ECHO
+    termios.tcsetattr(slave, termios.TCSANOW, attributes)
+    try:
+        process = subprocess.Popen(
+            command,
+            stdin=slave,
+            stdout=slave,
+            stderr=slave,
+            start_new_session=True,
+        )
+    except Exception:
+        os.close(master)
+        raise
+    finally:
+        os.close(slave)
+
+    session = _PtySession(
+        master,
+        output_handler,
+        PromptMatcher(DEFAULT_PROMPTS if prompts is None else prompts),
+    )
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        while True:
+            wait = READ_POLL_INTERVAL
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    raise subprocess.TimeoutExpired(command, timeout)
+            ready, _, _ = select.select([master], [], [], wait)
+            if not ready:
+                continue
+            try:
+                data = os.read(master, READ_SIZE)
+            except OSError:
+                # EIO: every process holding the terminal has exited
+                data = b""
+            if not data:
+                break
+            session.feed(decoder.decode(data))
+        session.feed(decoder.decode(b"", final=True))
+        return process.wait()
+    finally:
+        session.finish()
+        os.close(master)
+        if process.poll() is None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            process.wait()
@@ -10,6 +10,10 @@ if __name__ == "__main__":
     options = {}  # Customize as needed
     real_time = input("Real-time output? (yes/no): ").lower() == "yes"
     interactive = input("Is this command interactive? (yes/no): ").lower() == "yes"
+    use_pty = (
+        interactive
+        and input("Run it in a pseudo-terminal? (yes/no): ").lower() == "yes"
+    )
 
     command_params = CommandParameters(
         executable=executable,
@@ -17,6 +21,7 @@ if __name__ == "__main__":
         options=options,
         real_time=real_time,
         interactive=interactive,
+        use_pty=use_pty,
     )
     output_handler = ConsoleOutputHandler()
     # or FileOutputHandler() depending on the requirement
@@ -0,0 +1,323 @@
+import math
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+# Relative width of a histogram bucket; histogram percentiles are within half of it
+DEFAULT_PRECISION = 0.01
+# Durations below this many seconds (about 1 microsecond) share one bucket
+MIN_TRACKED_DURATION = 2.0**-20
+
+
+def exact_percentiles(
+    values: Sequence[float], percentiles: Iterable[float] = PERCENTILES
+) -> Dict[float, float]:
+    """
+    Computes percentiles with linear interpolation, using NumPy when available.
+
+    :param values: The durations, ideally a compact ``array('d')``.
+    :param percentiles: The percentiles to compute, between 0 and 100.
+    :return: Dictionary of percentile to value; empty without values.
+    """
+    percentiles = list(percentiles)
+    if len(values) == 0:
+        return {}
+    if np is not None:
+        data = (
+            np.frombuffer(values, dtype=np.float64)
+            if isinstance(values, array)
+            else np.asarray(values, dtype=np.float64)
+        )
+        return dict(zip(percentiles, np.percentile(data, percentiles).tolist()))
+
+    ordered = sorted(values)
+    result = {}
+    for percentile in percentiles:
+        rank = (len(ordered) - 1) * percentile / 100
+        low = math.floor(rank)
+        high = min(low + 1, len(ordered) - 1)
+        result[percentile] = ordered[low] + (ordered[high] - ordered[low]) * (
+            rank - low
+        )
+    return result
+
+
+class LatencyHistogram:
+    def __init__(
+        self,
+        precision: float = DEFAULT_PRECISION,
+        min_value: float = MIN_TRACKED_DURATION,
+    ):
+        """
+        HDR-style histogram of durations: one range per power of two, each split
+        into linear sub-buckets of ``precision`` relative width, so the histogram
+        stays small whatever the range of values. Histograms with the same
+        settings can be merged by adding their counts.
+
+        :param precision: Relative width of a sub-bucket.
+        :param min_value: Durations below this value share a single bucket.
+        """
+        self.precision = precision
+        self.min_value = min_value
+        self.sub_buckets = math.ceil(1 / precision)
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._underflow = self._index(min_value) - 1
+
+    def _index(self, value: float) -> int:
+        # value = 2**(exponent - 1) * (2 * mantissa), with 2 * mantissa in [1, 2)
+        mantissa, exponent = math.frexp(value)
+        return exponent * self.sub_buckets + int((2 * mantissa - 1) * self.sub_buckets)
+
+    def bucket(self, value: float) -> int:
+        """
+        Returns the index of the bucket a duration falls into.
+        """
+        if value < self.min_value:
+            return self._underflow
+        return self._index(value)
+
+    def bucket_bounds(self, index: int) -> Tuple[float, float]:
+        """
+        Returns the lower and upper duration of a bucket.
+        """
+        if index == self._underflow:
+            return 0.0, self.min_value
+        exponent, sub_bucket = divmod(index, self.sub_buckets)
+        scale = math.ldexp(1.0, exponent - 1)
+        return (
+            scale * (1 + sub_bucket / self.sub_buckets),
+            scale * (1 + (sub_bucket + 1) / self.sub_buckets),
+        )
+
+    def add(self, value: float, count: int = 1):
+        """
+        Records a duration.
+
+        :param value: The duration in seconds.
+        :param count: Number of times it occurred.
+        """
+        index = self.bucket(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """
+        Adds the counts of another histogram with the same settings.
+
+        :return: self, for chaining.
+        """
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentiles(
+        self, percentiles: Iterable[float] = PERCENTILES
+    ) -> Dict[float, float]:
+        """
+        Estimates percentiles with the linear interpolation of
+        ``exact_percentiles``, taking each duration as the middle of its bucket
+        (the smallest and largest are known exactly). Estimates are thus within
+        half a bucket, i.e. ``precision / 2``, of the exact percentiles.
+
+        :param percentiles: The percentiles to compute, between 0 and 100.
+        :return: Dictionary of percentile to value; empty without values.
+        """
+        if not self.count:
+            return {}
+        ordered = sorted(self.counts.items())
+        result = {}
+        for percentile in percentiles:
+            rank = (self.count - 1) * percentile / 100
+            low = math.floor(rank)
+            high = min(low + 1, self.count - 1)
+            low_value = self._order_statistic(ordered, low)
+            high_value = self._order_statistic(ordered, high)
+            result[percentile] = low_value + (high_value - low_value) * (rank - low)
+        return result
+
+    def _order_statistic(self, ordered: List[Tuple[int, int]], position: int) -> float:
+        # Estimate of the duration at the position (from 0) in sorted order
+        if position == 0:
+            return self.min
+        if position == self.count - 1:
+            return self.max
+        seen = 0
+        for index, count in ordered:
+            seen += count
+            if seen > position:
+                break
+        low, high = self.bucket_bounds(index)
+        return min(max((low + high) / 2, self.min), self.max)
+
+    def coarse_buckets(self) -> List[Tuple[float, float, int]]:
+        """
+        Groups the sub-buckets by power of two, for display.
+
+        :return: (lower bound, upper bound, count) of every non-empty range.
+        """
+        coarse: Dict[int, int] = {}
+        for index, count in self.counts.items():
+            exponent = index // self.sub_buckets
+            coarse[exponent] = coarse.get(exponent, 0) + count
+        buckets = []
+        for exponent, count in sorted(coarse.items()):
+            low = math.ldexp(1.0, exponent - 1)
+            if exponent == self._underflow // self.sub_buckets:
+                low = 0.0
+            buckets.append((low, math.ldexp(1.0, exponent), count))
+        return buckets
+
+
+class LatencyStats:
+    def __init__(
+        self,
+        window_seconds: Optional[float] = None,
+        keep_values: bool = True,
+        precision: float = DEFAULT_PRECISION,
+    ):
+        """
+        Latency aggregates of analyzed requests: overall percentiles and
+        histogram, plus per-thread and per-time-window histograms.
+
+        Overall percentiles are exact while ``keep_values`` is set: durations are
+        kept in a compact ``array('d')`` (8 bytes each) and evaluated with NumPy.
+        Breakdowns always use histograms, so their memory does not grow with the
+        number of requests.
+
+        :param window_seconds: Optional width of the time windows; requests
+            without a timestamp are left out of the window breakdown.
+        :param keep_values: Whether to keep every duration for exact percentiles.
+        :param precision: Relative bucket width of the histograms.
+        """
+        self.window_seconds = window_seconds
+        self.keep_values = keep_values
+        self.precision = precision
+        self.values = array("d")
+        self.histogram = LatencyHistogram(precision)
+        self.threads: Dict[str, LatencyHistogram] = {}
+        self.windows: Dict[float, LatencyHistogram] = {}
+
+    @property
+    def count(self) -> int:
+        return self.histogram.count
+
+    def add(
+        self,
+        duration: float,
+        thread_id: Optional[str] = None,
+        timestamp: Optional[float] = None,
+    ):
+        """
+        Records the duration of one request.
+
+        :param duration: The duration in seconds.
+        :param thread_id: The request's thread.
+        :param timestamp: Optional POSIX timestamp of the request's completion.
+        """
+        if self.keep_values:
+            self.values.append(duration)
+        self.histogram.add(duration)
+        if thread_id is not None:
+            if thread_id not in self.threads:
+                self.threads[thread_id] = LatencyHistogram(self.precision)
+            self.threads[thread_id].add(duration)
+        if self.window_seconds and timestamp is not None:
+            window = timestamp - timestamp % self.window_seconds
+            if window not in self.windows:
+                self.windows[window] = LatencyHistogram(self.precision)
+            self.windows[window].add(duration)
+
+    def merge(self, other: "LatencyStats") -> "LatencyStats":
+        """
+        Folds in the aggregates of another instance with the same settings.
+
+        :return: self, for chaining.
+        """
+        if self.keep_values:
+            self.values.extend(other.values)
+        self.histogram.merge(other.histogram)
+        for thread_id, histogram in other.threads.items():
+            self.threads.setdefault(thread_id, LatencyHistogram(self.precision)).merge(
+                histogram
+            )
+        for window, histogram in other.windows.items():
+            self.windows.setdefault(window, LatencyHistogram(self.precision)).merge(
+                histogram
+            )
+        return self
+
+    def percentiles(
+        self, percentiles: Iterable[float] = PERCENTILES
+    ) -> Dict[float, float]:
+        """
+        Returns the overall percentiles, exact if the durations were kept.
+        """
+        if self.keep_values and len(self.values) == self.count:
+            return exact_percentiles(self.values, percentiles)
+        return self.histogram.percentiles(percentiles)
+
+    def report(self, percentiles: Iterable[float] = PERCENTILES) -> str:
+        """
+        Formats the aggregates as a plain-text report.
+
+        :param percentiles: The percentiles to show.
+        :return: The report.
+        """
+        percentiles = list(percentiles)
+        lines = [
+            f"Requests: {self.count}, mean: {self.histogram.mean:.3f}s, "
+            f"max: {self.histogram.max:.3f}s",
+            format_percentiles(self.percentiles(percentiles)),
+            "",
+            "Histogram:",
+        ]
+        for low, high, count in self.histogram.coarse_buckets():
+            share = count / self.count
+            lines.append(
+                f"  [{low:10.6f}s, {high:10.6f}s) {count:>10} {'#' * round(share * 50)}"
+            )
+
+        if self.threads:
+            lines += ["", "Per thread:"]
+            for thread_id, histogram in sorted(self.threads.items()):
+                lines.append(
+                    f"  {thread_id}: n={histogram.count} "
+                    + format_percentiles(histogram.percentiles(percentiles))
+                )
+        if self.windows:
+            lines += ["", f"Per {self.window_seconds:g}s window:"]
+            for window, histogram in sorted(self.windows.items()):
+                start = datetime.fromtimestamp(window).isoformat(sep=" ")
+                lines.append(
+                    f"  {start}: n={histogram.count} "
+                    + format_percentiles(histogram.percentiles(percentiles))
+                )
+        return "\n".join(lines)
+
+
+def format_percentiles(values: Dict[float, float]) -> str:
+    return ", ".join(
+        f"p{percentile:g}: {value:.3f}s" for percentile, value in values.items()
+    )
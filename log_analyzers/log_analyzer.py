@@ -1,21 +1,61 @@
 import re
 import sys
 import argparse
-from typing import List, Tuple, Dict
+import glob
+import heapq
+import mmap
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Match,
+    Optional,
+    Tuple,
+)
+
+from latency_stats import LatencyStats, format_percentiles
+from log_formats import (
+    DEFAULT_LOG_FORMAT,
+    LOG_FORMATS,
+    CompiledLogFormat,
+    compile_log_format,
+    detect_log_format,
+)
 
 
 class LogEntry:
+    __slots__ = (
+        "thread_id",
+        "request_number",
+        "request_content",
+        "duration",
+        "timestamp",
+    )
+
     def __init__(
         self,
         thread_id: str,
         request_number: int,
         request_content: str,
         duration: float,
+        timestamp: Optional[float] = None,
     ):
         self.thread_id = thread_id
         self.request_number = request_number
         self.request_content = request_content
         self.duration = duration
+        # POSIX time of the "is done" line, if it starts with a timestamp
+        self.timestamp = timestamp
 
     def __repr__(self) -> str:
         return (
@@ -25,72 +65,982 @@ class LogEntry:
         )
 
 
-def analyze_log_file(file_path: str) -> List[LogEntry]:
-    # Regular expression patterns to match the required lines
-    thread_requestId_content_pattern = re.compile(
-        r"-------\[(.*?)\] Request \[(\d+)\] ------\n(.*?)\n---------------------------",
-        re.DOTALL,
-    )
-    thread_duration_pattern = re.compile(
-        r"\[(.*?)\]The Request \[(\d+)\] is done in ([\d.]+)s"
-    )
+# Leading timestamp of a log line, e.g. "2024-05-01 10:00:00,123"
+TIMESTAMP_PATTERN = re.compile(
+    r"\s*\[?(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?)"
+)
+MAPPED_TIMESTAMP_PATTERN = re.compile(TIMESTAMP_PATTERN.pattern.encode())
 
-    # List to store the LogEntry objects
-    results: List[LogEntry] = []
 
-    try:
-        with open(file_path, "r") as file:
-            log_content: str = file.read()
+def parse_timestamp(text: str) -> Optional[float]:
+    """
+    Reads the timestamp at the start of a log line.
+
+    :param text: The line, or its beginning.
+    :return: POSIX time, or None if the line has no leading timestamp.
+    """
+    match = TIMESTAMP_PATTERN.match(text)
+    if not match:
+        return None
+    return datetime.fromisoformat(match.group(1).replace(",", ".")).timestamp()
+
+
+# Request-content characters used to group requests by prefix
+DEFAULT_PREFIX_LENGTH = 40
+GROUP_BY_CHOICES = (None, "thread", "prefix")
+
+# Target size of the byte ranges parsed by each worker process
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Suffix of the sidecar index files written next to analyzed logs
+INDEX_SUFFIX = ".idx"
+
+# Follow mode: bytes read per call, seconds between polls and between snapshots
+CHUNK_SIZE = 64 * 1024
+DEFAULT_POLL_INTERVAL = 1.0
+DEFAULT_SNAPSHOT_INTERVAL = 10.0
+
+# Requests waiting for their "is done" line before the oldest one is given up on
+MAX_PENDING_REQUESTS = 100_000
+# Characters of a request block beyond which it is given up on as unterminated
+MAX_BLOCK_SIZE = 16 * 1024 * 1024
+
+
+class RequestLogParser:
+    def __init__(
+        self,
+        max_pending: int = MAX_PENDING_REQUESTS,
+        track_unmatched: bool = False,
+        log_format: str = DEFAULT_LOG_FORMAT,
+        max_block_size: int = MAX_BLOCK_SIZE,
+    ):
+        """
+        Single-pass parser turning log lines into LogEntry objects.
+
+        A request is pending from the end of its block (e.g. ``Request [n]``)
+        until its done line (e.g. ``is done in Xs``), so memory grows with the
+        number of requests in flight rather than with the size of the log. When
+        more than ``max_pending`` requests are pending, the oldest one is emitted
+        without a duration (0.0), as are requests still pending at the end of the
+        log. In formats without done lines, requests complete with their block.
+
+        With ``track_unmatched``, durations whose request block was not seen (e.g.
+        because it lies before the parsed byte range) are kept in ``unmatched``,
+        up to ``max_pending`` of them.
+
+        A block still open after ``max_block_size`` characters, e.g. because its
+        end line is missing, is dropped and counted in ``abandoned_blocks``.
+
+        :param max_pending: Maximum number of pending requests kept.
+        :param track_unmatched: Whether to keep durations without a request block.
+        :param log_format: Name of a registered log format.
+        :param max_block_size: Maximum number of characters of a request block.
+        """
+        self.format = compile_log_format(log_format)
+        self.max_pending = max_pending
+        self.track_unmatched = track_unmatched
+        self.max_block_size = max_block_size
+        self.abandoned_blocks = 0
+        # (thread id, request number) -> (duration, timestamp)
+        self.unmatched: Dict[Tuple[str, int], Tuple[float, Optional[float]]] = {}
+        self._pending: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+        self._block_key: Optional[Tuple[str, int]] = None
+        self._block_lines: List[str] = []
+        self._block_size = 0
+        self._block_timestamp: Optional[float] = None
+        # Numbers the requests of formats without request numbers
+        self._sequence = 0
+
+    def feed(self, line: str) -> Tuple[LogEntry, ...]:
+        """
+        Parses one line of the log.
+
+        :param line: The line, with or without its line break.
+        :return: The requests completed by this line, usually none.
+        """
+        line = line.rstrip("\r\n")
+        log_format = self.format
+        if self._block_key is not None:
+            if not log_format.is_block_end(line):
+                self._block_lines.append(line)
+                self._block_size += len(line) + 1
+                if self._block_size > self.max_block_size:
+                    self._block_key = None
+                    self._block_lines = []
+                    self.abandoned_blocks += 1
+                # Done lines of other requests may be interleaved with the block
+                if log_format.done is not None and log_format.prefilter(line):
+                    return self._match_done(line)
+                return ()
+            if log_format.include_end_line:
+                self._block_lines.append(line)
+            return self._end_block()
 
-        # Extract all request details
-        thread_requestId_content_list: List[Tuple[str, str, str]] = (
-            thread_requestId_content_pattern.findall(log_content)
+        if not log_format.prefilter(line):
+            return ()
+        match = log_format.start.search(line)
+        if match:
+            self._block_key = (match.group("thread"), self.request_number(match))
+            self._block_lines = []
+            self._block_size = 0
+            self._block_timestamp = parse_timestamp(line)
+            rest = line[match.end() :]
+            if rest.strip():
+                self._block_lines.append(rest)
+                self._block_size = len(rest)
+                if log_format.is_block_end(rest):
+                    return self._end_block()
+            return ()
+        if log_format.done is not None:
+            return self._match_done(line)
+        return ()
+
+    def _match_done(self, line: str) -> Tuple[LogEntry, ...]:
+        match = self.format.done.search(line)
+        if not match:
+            return ()
+        return self.complete_request(
+            (match.group("thread"), int(match.group("request"))),
+            float(match.group("duration")),
+            parse_timestamp(line),
         )
-        thread_requestId_content_dict: Dict[Tuple[str, int], str] = {
-            (thread, int(num)): content
-            for (thread, num, content) in thread_requestId_content_list
+
+    def request_number(self, match: Match) -> int:
+        """
+        Returns the number of the request whose block start was matched.
+        """
+        if self.format.has_request_number:
+            return int(match.group("request"))
+        self._sequence += 1
+        return self._sequence
+
+    def _end_block(self) -> Tuple[LogEntry, ...]:
+        key = self._block_key
+        self._block_key = None
+        content = self.format.extract_payload("\n".join(self._block_lines))
+        self._block_lines = []
+        return self.add_request(key, content, self._block_timestamp)
+
+    def add_request(
+        self, key: Tuple[str, int], content: str, timestamp: Optional[float] = None
+    ) -> Tuple[LogEntry, ...]:
+        """
+        Registers a parsed request block as pending, or as complete in formats
+        without done lines.
+
+        :param key: Thread id and request number.
+        :param content: The stripped request content, or its byte span in the file.
+        :param timestamp: POSIX time of the block's start line, if known.
+        :return: The completed request, or the oldest pending request if the
+            table overflowed.
+        """
+        if self.format.done is None:
+            return (LogEntry(key[0], key[1], content, 0.0, timestamp),)
+        self._pending[key] = content
+        self._pending.move_to_end(key)
+        if len(self._pending) <= self.max_pending:
+            return ()
+        (thread_id, request_id), content = self._pending.popitem(last=False)
+        return (LogEntry(thread_id, request_id, content, 0.0),)
+
+    def complete_request(
+        self, key: Tuple[str, int], duration: float, timestamp: Optional[float] = None
+    ) -> Tuple[LogEntry, ...]:
+        """
+        Registers a parsed "is done" line.
+
+        :param key: Thread id and request number.
+        :param duration: The request's duration in seconds.
+        :param timestamp: POSIX time of the line, if known.
+        :return: The completed request, if its block was seen.
+        """
+        content = self._pending.pop(key, None)
+        if content is not None:
+            return (LogEntry(key[0], key[1], content, duration, timestamp),)
+        if self.track_unmatched and len(self.unmatched) < self.max_pending:
+            self.unmatched[key] = (duration, timestamp)
+        return ()
+
+    def take_pending(self) -> List[Tuple[Tuple[str, int], str]]:
+        """
+        Removes and returns the requests still waiting for their duration.
+
+        :return: (thread id, request number) and content of each, oldest first.
+        """
+        pending = list(self._pending.items())
+        self._pending.clear()
+        return pending
+
+    def finish(self) -> List[LogEntry]:
+        """
+        Ends the log: requests that never got their duration are returned with 0.0.
+
+        :return: The requests still pending.
+        """
+        entries = [
+            LogEntry(thread_id, request_id, content, 0.0)
+            for (thread_id, request_id), content in self._pending.items()
+        ]
+        self._pending.clear()
+        self._block_key = None
+        self._block_lines = []
+        return entries
+
+
+def parse_log_lines(
+    lines: Iterable[str],
+    max_pending: int = MAX_PENDING_REQUESTS,
+    log_format: str = DEFAULT_LOG_FORMAT,
+) -> Iterator[LogEntry]:
+    """
+    Lazily parses log lines into LogEntry objects, in order of completion.
+
+    :param lines: The lines of the log.
+    :param max_pending: Maximum number of requests waiting for their duration.
+    :param log_format: Name of a registered log format.
+    :return: Iterator over the parsed entries.
+    """
+    parser = RequestLogParser(max_pending, log_format=log_format)
+    for line in lines:
+        yield from parser.feed(line)
+    yield from parser.finish()
+
+
+def iter_log_file(
+    file_path: str,
+    max_pending: int = MAX_PENDING_REQUESTS,
+    log_format: Optional[str] = None,
+) -> Iterator[LogEntry]:
+    """
+    Lazily parses a log file line by line, without reading it into memory.
+
+    :param file_path: Path to the log file.
+    :param max_pending: Maximum number of requests waiting for their duration.
+    :param log_format: Name of a registered log format; detected if omitted.
+    :return: Iterator over the parsed entries.
+    """
+    log_format = log_format or detect_log_format(file_path)
+    with open(file_path, "r", errors="replace") as file:
+        yield from parse_log_lines(file, max_pending, log_format)
+
+
+def scan_mapped_range(
+    data: mmap.mmap,
+    start: int,
+    end: int,
+    parser: RequestLogParser,
+    content_spans: bool = False,
+) -> Iterator[LogEntry]:
+    """
+    Runs the byte pattern over [start, end) of a memory-mapped log. Only the
+    thread ids and request contents of matches are decoded.
+
+    :param data: The mapped file.
+    :param start: Offset where scanning starts.
+    :param end: Offset where scanning stops.
+    :param parser: Parser holding the pending requests.
+    :param content_spans: Whether to leave the request content in the file: the
+        entries' ``request_content`` is then its (start, end) byte offsets.
+    :return: Iterator over the completed entries.
+    """
+    log_format = parser.format
+    if log_format.mapped is None:
+        raise ValueError(f"Log format '{log_format.name}' has no byte pattern")
+    for match in log_format.mapped.finditer(data, start, end):
+        line_start = data.rfind(b"\n", 0, match.start()) + 1
+        timestamp = MAPPED_TIMESTAMP_PATTERN.match(data, line_start, match.start())
+        timestamp = parse_timestamp(timestamp.group(1).decode()) if timestamp else None
+        if match.group("content") is not None:
+            key = (
+                match.group("thread").decode("utf-8", errors="replace"),
+                parser.request_number(match),
+            )
+            if content_spans:
+                content = match.span("content")
+            else:
+                content = match.group("content").decode("utf-8", errors="replace")
+                content = content.strip()
+            yield from parser.add_request(key, content, timestamp)
+        else:
+            key = (
+                match.group("done_thread").decode("utf-8", errors="replace"),
+                int(match.group("done_request")),
+            )
+            yield from parser.complete_request(
+                key, float(match.group("duration")), timestamp
+            )
+
+
+@contextmanager
+def map_log_file(file_path: str) -> Iterator[Optional[mmap.mmap]]:
+    """
+    Memory-maps a log file read-only, hinting the OS at sequential access.
+
+    :param file_path: Path to the log file.
+    :return: Context manager yielding the mapping, or None for an empty file.
+    """
+    with open(file_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield None
+            return
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if hasattr(data, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                data.madvise(mmap.MADV_SEQUENTIAL)
+            yield data
+        finally:
+            data.close()
+
+
+def iter_mapped_log_file(
+    file_path: str,
+    max_pending: int = MAX_PENDING_REQUESTS,
+    log_format: Optional[str] = None,
+) -> Iterator[LogEntry]:
+    """
+    Lazily parses a log file through a memory map instead of reading lines, so
+    the file is never copied into Python strings.
+
+    :param file_path: Path to the log file.
+    :param max_pending: Maximum number of requests waiting for their duration.
+    :param log_format: Name of a registered log format; detected if omitted.
+    :return: Iterator over the parsed entries.
+    """
+    parser = RequestLogParser(
+        max_pending, log_format=log_format or detect_log_format(file_path)
+    )
+    with map_log_file(file_path) as data:
+        if data is not None:
+            yield from scan_mapped_range(data, 0, len(data), parser)
+    yield from parser.finish()
+
+
+class SlowestRequests:
+    def __init__(
+        self,
+        k: int = 10,
+        group_by: Optional[str] = None,
+        prefix_length: int = DEFAULT_PREFIX_LENGTH,
+    ):
+        """
+        Keeps the ``k`` slowest requests seen so far in fixed-size min-heaps,
+        without storing or sorting every entry.
+
+        :param k: Number of requests kept (per group).
+        :param group_by: None for one overall top-K, 'thread' for one per thread or
+            'prefix' for one per request-content prefix.
+        :param prefix_length: Number of content characters forming the prefix.
+        """
+        if group_by not in GROUP_BY_CHOICES:
+            raise ValueError(f"Unknown grouping '{group_by}'")
+        self.k = k
+        self.group_by = group_by
+        self.prefix_length = prefix_length
+        self.count = 0
+        self._sequence = 0
+        # group -> min-heap of (duration, sequence number, entry)
+        self._heaps: Dict[Optional[str], List[Tuple[float, int, LogEntry]]] = {}
+
+    def group_of(self, entry: LogEntry) -> Optional[str]:
+        """
+        Returns the group an entry is ranked in.
+        """
+        if self.group_by == "thread":
+            return entry.thread_id
+        if self.group_by == "prefix":
+            return entry.request_content[: self.prefix_length]
+        return None
+
+    def add(self, entry: LogEntry):
+        """
+        Offers an entry to its group's heap.
+        """
+        self.count += 1
+        self._offer(entry)
+
+    def _offer(self, entry: LogEntry):
+        if self.k <= 0:
+            return
+        heap = self._heaps.setdefault(self.group_of(entry), [])
+        if len(heap) < self.k:
+            self._sequence += 1
+            heapq.heappush(heap, (entry.duration, self._sequence, entry))
+        elif entry.duration > heap[0][0]:
+            self._sequence += 1
+            heapq.heapreplace(heap, (entry.duration, self._sequence, entry))
+
+    def update(self, entries: Iterable[LogEntry]) -> "SlowestRequests":
+        """
+        Offers every entry of an iterable, e.g. a streaming parser.
+
+        :return: self, for chaining.
+        """
+        for entry in entries:
+            self.add(entry)
+        return self
+
+    def merge(self, other: "SlowestRequests") -> "SlowestRequests":
+        """
+        Folds in the requests kept by another instance with the same settings.
+
+        :return: self, for chaining.
+        """
+        for heap in other._heaps.values():
+            for _, _, entry in heap:
+                self._offer(entry)
+        self.count += other.count
+        return self
+
+    def groups(self) -> Dict[Optional[str], List[LogEntry]]:
+        """
+        Returns the slowest requests of every group, slowest first.
+
+        :return: Dictionary of group (None without grouping) to entries.
+        """
+        return {
+            group: [entry for _, _, entry in sorted(heap, reverse=True)]
+            for group, heap in sorted(
+                self._heaps.items(), key=lambda item: item[0] or ""
+            )
         }
 
-        # Extract all thread durations
-        thread_duration_list: List[Tuple[str, str, str]] = (
-            thread_duration_pattern.findall(log_content)
+    def top(self) -> List[LogEntry]:
+        """
+        Returns the ``k`` slowest requests over all groups, slowest first.
+        """
+        items = [item for heap in self._heaps.values() for item in heap]
+        return [entry for _, _, entry in heapq.nlargest(self.k, items)]
+
+
+class LogSummary:
+    def __init__(
+        self,
+        k: int = 10,
+        group_by: Optional[str] = None,
+        prefix_length: int = DEFAULT_PREFIX_LENGTH,
+        window_seconds: Optional[float] = None,
+        keep_values: bool = True,
+    ):
+        """
+        Aggregates of analyzed requests that can be computed piecewise and merged:
+        the slowest requests and the latency statistics.
+
+        :param k: Number of slowest requests kept (per group).
+        :param group_by: None, 'thread' or 'prefix'.
+        :param prefix_length: Number of content characters forming the prefix.
+        :param window_seconds: Optional width of the latency time windows.
+        :param keep_values: Whether to keep every duration for exact percentiles.
+        """
+        self.slowest = SlowestRequests(k, group_by, prefix_length)
+        self.latency = LatencyStats(window_seconds, keep_values)
+
+    @property
+    def count(self) -> int:
+        return self.slowest.count
+
+    def empty_copy(self) -> "LogSummary":
+        """
+        Returns an empty summary with the same settings.
+        """
+        return LogSummary(
+            self.slowest.k,
+            self.slowest.group_by,
+            self.slowest.prefix_length,
+            self.latency.window_seconds,
+            self.latency.keep_values,
         )
-        thread_duration_dict: Dict[Tuple[str, int], float] = {
-            (thread, int(num)): float(duration)
-            for (thread, num, duration) in thread_duration_list
-        }
 
-        # Process each request and find the corresponding content and duration
-        for (
-            thread_id,
-            request_id,
-        ), request_content in thread_requestId_content_dict.items():
-
-            # Find processing duration
-            duration: float = thread_duration_dict.get((thread_id, request_id), 0.0)
-
-            # Create LogEntry and add to results, limit request_content to 1000 characters
-            results.append(
-                LogEntry(
-                    thread_id,
-                    request_id,
-                    request_content.strip(),  # Limit the content length
-                    duration,
+    def add(self, entry: LogEntry):
+        """
+        Accounts for one request.
+        """
+        self.slowest.add(entry)
+        self.latency.add(entry.duration, entry.thread_id, entry.timestamp)
+
+    def update(self, entries: Iterable[LogEntry]) -> "LogSummary":
+        """
+        Accounts for every entry of an iterable, e.g. a streaming parser.
+
+        :return: self, for chaining.
+        """
+        for entry in entries:
+            self.add(entry)
+        return self
+
+    def merge(self, other: "LogSummary") -> "LogSummary":
+        """
+        Folds in the aggregates of another summary with the same settings.
+
+        :return: self, for chaining.
+        """
+        self.slowest.merge(other.slowest)
+        self.latency.merge(other.latency)
+        return self
+
+
+class RangeResult:
+    def __init__(
+        self,
+        path: str,
+        start: int,
+        summary: LogSummary,
+        pending: List[Tuple[Tuple[str, int], str]],
+        unmatched: Dict[Tuple[str, int], Tuple[float, Optional[float]]],
+    ):
+        """
+        Partial result of analyzing one byte range of a log file.
+
+        :param path: Path to the log file.
+        :param start: Offset of the range in the file.
+        :param summary: Aggregates of the requests completed within the range.
+        :param pending: Requests of the range whose duration was not in it.
+        :param unmatched: Durations and timestamps in the range whose request
+            block was not.
+        """
+        self.path = path
+        self.start = start
+        self.summary = summary
+        self.pending = pending
+        self.unmatched = unmatched
+
+
+def expand_log_paths(patterns: Iterable[str]) -> List[str]:
+    """
+    Resolves file paths, directories (all files inside, recursively, except index
+    files) and glob patterns into a sorted list of log files.
+
+    :param patterns: The paths, directories or patterns.
+    :return: The log files.
+    :raises FileNotFoundError: If a pattern matches nothing.
+    """
+    paths = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True) or [pattern]
+        for match in matches:
+            if os.path.isdir(match):
+                for root, _, files in os.walk(match):
+                    paths.update(
+                        os.path.join(root, name)
+                        for name in files
+                        if not name.endswith(INDEX_SUFFIX)
+                    )
+            elif os.path.isfile(match):
+                paths.add(match)
+            else:
+                raise FileNotFoundError(match)
+    return sorted(paths)
+
+
+def _next_request_start(
+    file: BinaryIO, offset: int, log_format: CompiledLogFormat
+) -> int:
+    # Offset of the first request block starting at or after ``offset``
+    if offset > 0:
+        file.seek(offset - 1)
+        file.readline()
+    else:
+        file.seek(0)
+    while True:
+        position = file.tell()
+        line = file.readline()
+        if not line:
+            return position
+        text = line.decode("utf-8", errors="replace").rstrip("\r\n")
+        if log_format.prefilter(text) and log_format.start.search(text):
+            return position
+
+
+def split_log_file(
+    path: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    log_format: str = DEFAULT_LOG_FORMAT,
+) -> List[Tuple[int, int]]:
+    """
+    Splits a log file into byte ranges of about ``chunk_size`` bytes, each one
+    starting at a request block so that no block is cut in two.
+
+    :param path: Path to the log file.
+    :param chunk_size: Target size of a range in bytes.
+    :param log_format: Name of the log's format.
+    :return: (start, end) offsets of the ranges.
+    :raises ValueError: If ``chunk_size`` is not positive.
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+    compiled_format = compile_log_format(log_format)
+    size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, "rb") as file:
+        while boundaries[-1] + chunk_size < size:
+            boundary = _next_request_start(
+                file, boundaries[-1] + chunk_size, compiled_format
+            )
+            if boundary >= size or boundary <= boundaries[-1]:
+                break
+            boundaries.append(boundary)
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def analyze_range(
+    path: str,
+    start: int,
+    end: int,
+    summary: LogSummary,
+    max_pending: int = MAX_PENDING_REQUESTS,
+    use_mmap: bool = False,
+    log_format: str = DEFAULT_LOG_FORMAT,
+) -> RangeResult:
+    """
+    Parses the byte range [start, end) of a log file. Runs in a worker process.
+
+    :param path: Path to the log file.
+    :param start: Offset where the range starts, at a request block.
+    :param end: Offset where the range ends.
+    :param summary: Empty summary to fill.
+    :param max_pending: Maximum number of requests waiting for their duration.
+    :param use_mmap: Whether to scan a memory map instead of reading lines.
+    :param log_format: Name of the log's format.
+    :return: The partial result of the range.
+    """
+    parser = RequestLogParser(max_pending, start > 0, log_format)
+    if use_mmap:
+        with map_log_file(path) as data:
+            if data is not None:
+                summary.update(scan_mapped_range(data, start, end, parser))
+        return RangeResult(
+            path, start, summary, parser.take_pending(), parser.unmatched
+        )
+
+    with open(path, "rb") as file:
+        file.seek(start)
+        position = start
+        while position < end:
+            line = file.readline()
+            if not line:
+                break
+            position += len(line)
+            for entry in parser.feed(line.decode("utf-8", errors="replace")):
+                summary.add(entry)
+    return RangeResult(path, start, summary, parser.take_pending(), parser.unmatched)
+
+
+def merge_range_results(
+    results: Iterable[RangeResult], summary: LogSummary
+) -> LogSummary:
+    """
+    Combines the partial results of byte ranges. Requests left pending at the end
+    of a range are matched with the durations found in the following ranges of
+    the same file.
+
+    :param results: The partial results, in any order.
+    :param summary: Empty summary receiving the combined aggregates.
+    :return: The summary over all ranges.
+    """
+    by_file: Dict[str, List[RangeResult]] = {}
+    for result in results:
+        by_file.setdefault(result.path, []).append(result)
+
+    for path in sorted(by_file):
+        carried: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+        for result in sorted(by_file[path], key=lambda r: r.start):
+            for key, (duration, timestamp) in result.unmatched.items():
+                content = carried.pop(key, None)
+                if content is not None:
+                    summary.add(LogEntry(key[0], key[1], content, duration, timestamp))
+            summary.merge(result.summary)
+            carried.update(result.pending)
+        for (thread_id, request_id), content in carried.items():
+            summary.add(LogEntry(thread_id, request_id, content, 0.0))
+    return summary
+
+
+def analyze_logs(
+    patterns: Iterable[str],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    summary: Optional[LogSummary] = None,
+    use_mmap: bool = False,
+    log_format: Optional[str] = None,
+) -> LogSummary:
+    """
+    Analyzes log files in parallel. Files are split into byte ranges aligned on
+    request blocks, each range is parsed in a worker process and the partial
+    results are merged.
+
+    :param patterns: Log files, directories or glob patterns.
+    :param workers: Number of worker processes; defaults to the CPU count. With
+        1, everything runs in the calling process.
+    :param chunk_size: Target size of a byte range.
+    :param summary: Empty summary defining what to aggregate; defaults to the ten
+        slowest requests and the latency statistics.
+    :param use_mmap: Whether to scan memory-mapped files with byte patterns.
+    :param log_format: Name of the logs' format; detected per file if omitted.
+    :return: The summary over all files.
+    """
+    summary = summary or LogSummary()
+    ranges = []
+    for path in expand_log_paths(patterns):
+        path_format = log_format or detect_log_format(path)
+        for start, end in split_log_file(path, chunk_size, path_format):
+            ranges.append((path, start, end, path_format))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(ranges) <= 1:
+        results = [
+            analyze_range(
+                path,
+                start,
+                end,
+                summary.empty_copy(),
+                use_mmap=use_mmap,
+                log_format=path_format,
+            )
+            for path, start, end, path_format in ranges
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+            futures = [
+                executor.submit(
+                    analyze_range,
+                    path,
+                    start,
+                    end,
+                    summary.empty_copy(),
+                    use_mmap=use_mmap,
+                    log_format=path_format,
                 )
+                for path, start, end, path_format in ranges
+            ]
+            results = [future.result() for future in as_completed(futures)]
+    return merge_range_results(results, summary)
+
+
+class LogFollower:
+    def __init__(
+        self,
+        file_path: str,
+        from_start: bool = False,
+        max_pending: int = MAX_PENDING_REQUESTS,
+        log_format: Optional[str] = None,
+    ):
+        """
+        Incrementally parses a growing log file, like ``tail -F``.
+
+        Each ``poll`` parses the complete lines appended since the previous one.
+        When the file is rotated (replaced by a new file at the same path), the
+        rest of the old file is read before switching to its successor; a
+        truncated file is read again from the start. The parser state carries
+        over, so requests whose block and "is done" line end up in different
+        polls or files are still matched.
+
+        :param file_path: Path to the log file.
+        :param from_start: Whether to parse the existing content, or only what
+            is appended from now on.
+        :param max_pending: Maximum number of requests waiting for their duration.
+        :param log_format: Name of a registered log format; detected from the
+            file's first bytes if omitted.
+        """
+        self.file_path = file_path
+        if log_format is None:
+            log_format = (
+                detect_log_format(file_path)
+                if os.path.exists(file_path)
+                else DEFAULT_LOG_FORMAT
             )
+        self.parser = RequestLogParser(max_pending, log_format=log_format)
+        self._file: Optional[BinaryIO] = None
+        self._inode: Optional[int] = None
+        self._partial = b""
+        self._open(seek_end=not from_start)
+
+    def _open(self, seek_end: bool = False) -> bool:
+        try:
+            file = open(self.file_path, "rb")
+        except FileNotFoundError:
+            return False
+        self._file = file
+        self._inode = os.fstat(file.fileno()).st_ino
+        self._partial = b""
+        if seek_end:
+            file.seek(0, os.SEEK_END)
+        return True
+
+    def _read_available(self) -> List[LogEntry]:
+        entries: List[LogEntry] = []
+        while True:
+            data = self._file.read(CHUNK_SIZE)
+            if not data:
+                return entries
+            lines = (self._partial + data).split(b"\n")
+            self._partial = lines.pop()
+            for line in lines:
+                entries.extend(self.parser.feed(line.decode("utf-8", errors="replace")))
+
+    def poll(self) -> List[LogEntry]:
+        """
+        Parses what was appended since the last poll.
+
+        :return: The requests completed by the new lines.
+        """
+        if self._file is None and not self._open():
+            return []
+        entries = self._read_available()
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            # Rotated away and not recreated yet
+            return entries
+        if stat.st_ino != self._inode:
+            # The old file is complete: read what was written before the switch,
+            # its last line needs no line break
+            entries.extend(self._read_available())
+            if self._partial:
+                entries.extend(
+                    self.parser.feed(self._partial.decode("utf-8", errors="replace"))
+                )
+            self._file.close()
+            if self._open():
+                entries.extend(self._read_available())
+        elif stat.st_size < self._file.tell():
+            self._file.seek(0)
+            self._partial = b""
+            entries.extend(self._read_available())
+        return entries
+
+    def close(self):
+        """
+        Closes the followed file.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
 
-    except FileNotFoundError:
+
+def format_snapshot(summary: LogSummary, k: int) -> str:
+    """
+    Formats the requests of one follow interval as a short report.
+
+    :param summary: Aggregates of the interval.
+    :param k: Number of slowest requests listed.
+    :return: The report.
+    """
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    lines = [
+        f"[{now}] {summary.count} requests. "
+        + format_percentiles(summary.latency.percentiles())
+    ]
+    for entry in summary.slowest.top()[:k]:
+        lines.append(
+            f"  {entry.duration:8.2f}s  thread={entry.thread_id} "
+            f"request={entry.request_number}"
+        )
+    return "\n".join(lines)
+
+
+def follow_log_file(
+    file_path: str,
+    summary: LogSummary,
+    interval: float = DEFAULT_SNAPSHOT_INTERVAL,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+    from_start: bool = False,
+    on_entry: Optional[Callable[[LogEntry], None]] = None,
+    on_snapshot: Optional[Callable[[LogSummary], None]] = None,
+    stop: Optional[threading.Event] = None,
+    log_format: Optional[str] = None,
+):
+    """
+    Follows a growing log, reporting the requests of every ``interval`` seconds.
+
+    :param file_path: Path to the log file.
+    :param summary: Empty summary defining what to aggregate per interval.
+    :param interval: Seconds between snapshots.
+    :param poll_interval: Seconds between checks for new lines.
+    :param from_start: Whether to parse the existing content first.
+    :param on_entry: Optional callback receiving each completed request as soon
+        as it is parsed, e.g. to alert on slow requests.
+    :param on_snapshot: Callback receiving the aggregates of each interval;
+        prints them by default.
+    :param stop: Optional event ending the loop; otherwise runs until
+        interrupted.
+    :param log_format: Name of the log's format; detected if omitted.
+    """
+    if on_snapshot is None:
+
+        def on_snapshot(window: LogSummary) -> None:
+            print(format_snapshot(window, summary.slowest.k), flush=True)
+
+    stop = stop or threading.Event()
+    follower = LogFollower(file_path, from_start, log_format=log_format)
+    window = summary.empty_copy()
+    next_snapshot = time.monotonic() + interval
+    try:
+        while not stop.is_set():
+            for entry in follower.poll():
+                window.add(entry)
+                if on_entry is not None:
+                    on_entry(entry)
+            if time.monotonic() >= next_snapshot:
+                on_snapshot(window)
+                window = summary.empty_copy()
+                next_snapshot = time.monotonic() + interval
+            stop.wait(poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        follower.close()
+
+
+def _print_error(file_path: str, error: Exception) -> None:
+    if isinstance(error, FileNotFoundError):
         print(f"Error: The file at {file_path} was not found.")
-    except IOError:
+    elif isinstance(error, IOError):
         print(f"Error: An I/O error occurred while reading the file at {file_path}.")
-    except ValueError as ve:
-        print(f"Error: A value error occurred: {ve}")
+    elif isinstance(error, ValueError):
+        print(f"Error: A value error occurred: {error}")
+    else:
+        print(f"Error: An unexpected error occurred: {error}")
+
+
+def analyze_log_file(
+    file_path: str, log_format: Optional[str] = None
+) -> List[LogEntry]:
+    # List to store the LogEntry objects
+    results: List[LogEntry] = []
+
+    try:
+        results.extend(iter_log_file(file_path, log_format=log_format))
     except Exception as e:
-        print(f"Error: An unexpected error occurred: {e}")
+        _print_error(file_path, e)
 
     return results
 
 
+def find_slowest_requests(
+    file_path: str,
+    k: int = 10,
+    group_by: Optional[str] = None,
+    prefix_length: int = DEFAULT_PREFIX_LENGTH,
+    log_format: Optional[str] = None,
+) -> SlowestRequests:
+    """
+    Streams a log file and keeps only its slowest requests.
+
+    :param file_path: Path to the log file.
+    :param k: Number of requests kept (per group).
+    :param group_by: None, 'thread' or 'prefix'.
+    :param prefix_length: Number of content characters forming the prefix.
+    :param log_format: Name of the log's format; detected if omitted.
+    :return: The slowest requests found.
+    """
+    slowest = SlowestRequests(k, group_by, prefix_length)
+    try:
+        slowest.update(iter_log_file(file_path, log_format=log_format))
+    except Exception as e:
+        _print_error(file_path, e)
+    return slowest
+
+
 def print_formatted_results(results: List[LogEntry]) -> None:
     for entry in results:
         print(f"{entry}\n\n")
@@ -101,17 +1051,201 @@ if __name__ == "__main__":
         description="Analyze log file and extract request details."
     )
     parser.add_argument(
-        "--log_file", type=str, required=True, help="Path to the log file"
+        "--log_file",
+        type=str,
+        nargs="+",
+        required=True,
+        help="Path to the log file; also accepts directories and glob patterns",
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, help="Number of slowest requests to show"
+    )
+    parser.add_argument(
+        "--group_by",
+        choices=["thread", "prefix"],
+        help="Show the slowest requests per thread or per request-content prefix",
+    )
+    parser.add_argument(
+        "--prefix_length",
+        type=int,
+        default=DEFAULT_PREFIX_LENGTH,
+        help="Number of request-content characters used by --group_by prefix",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--chunk_size_mb",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE // (1024 * 1024),
+        help="Size in MB of the file ranges parsed by each worker",
+    )
+    parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="Scan memory-mapped files with byte patterns instead of reading lines",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print latency percentiles and histograms per thread and time window",
+    )
+    parser.add_argument(
+        "--window_seconds",
+        type=float,
+        default=None,
+        help="Width of the time windows of --stats (needs timestamped lines)",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Follow the growing log file (and its rotated successors)",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_SNAPSHOT_INTERVAL,
+        help="Seconds between the snapshots printed by --follow",
+    )
+    parser.add_argument(
+        "--alert_seconds",
+        type=float,
+        default=None,
+        help="With --follow, report requests slower than this immediately",
+    )
+    parser.add_argument(
+        "--from_start",
+        action="store_true",
+        help="With --follow, also parse the existing content of the file",
+    )
+    parser.add_argument(
+        "--log_format",
+        choices=sorted(LOG_FORMATS),
+        default=None,
+        help="Format of the log files (default: detected per file)",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Write every parsed request to a .parquet or .duckdb file instead "
+        "of printing the slowest ones",
+    )
+    parser.add_argument(
+        "--output_table",
+        type=str,
+        default="requests",
+        help="Table of the --output DuckDB database, replaced if it exists",
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="Query a sidecar index of each log file, building it if needed",
+    )
+    parser.add_argument(
+        "--index_dir",
+        type=str,
+        default=None,
+        help="Directory of the --index files (default: next to each log file)",
+    )
+    parser.add_argument(
+        "--thread", type=str, default=None, help="With --index, only this thread"
+    )
+    parser.add_argument(
+        "--min_duration",
+        type=float,
+        default=None,
+        help="With --index, only requests at least this many seconds long",
     )
 
     args = parser.parse_args()
 
-    log_file_path: str = args.log_file
-    entries: List[LogEntry] = analyze_log_file(log_file_path)
+    log_file_paths: List[str] = args.log_file
+    if args.chunk_size_mb <= 0:
+        parser.error("--chunk_size_mb must be positive")
+    if args.follow:
+        if len(log_file_paths) != 1:
+            parser.error("--follow takes a single log file")
+
+        def alert(entry: LogEntry) -> None:
+            if args.alert_seconds is not None and entry.duration >= args.alert_seconds:
+                print(
+                    f"ALERT: request {entry.request_number} of thread "
+                    f"{entry.thread_id} took {entry.duration:.2f}s",
+                    flush=True,
+                )
+
+        follow_log_file(
+            log_file_paths[0],
+            LogSummary(args.top, args.group_by, args.prefix_length),
+            args.interval,
+            from_start=args.from_start,
+            on_entry=alert,
+            log_format=args.log_format,
+        )
+        sys.exit(0)
+
+    if args.output:
+        # Imported here: the export module builds on this one
+        from log_export import export_logs
+
+        try:
+            count = export_logs(
+                log_file_paths,
+                args.output,
+                args.output_table,
+                use_mmap=args.mmap,
+                log_format=args.log_format,
+            )
+        except Exception as e:
+            _print_error(", ".join(log_file_paths), e)
+            sys.exit(1)
+        print(f"Wrote {count} requests to {args.output}")
+        sys.exit(0)
+
+    if args.index:
+        # Imported here: the index modules build on this one
+        from log_index import open_log_table
+
+        matches = []
+        try:
+            for log_path in expand_log_paths(log_file_paths):
+                table = open_log_table(
+                    log_path, args.index_dir, log_format=args.log_format
+                )
+                rows = table.select(args.thread, args.min_duration)
+                matches.extend(table.slowest(args.top, rows))
+        except Exception as e:
+            _print_error(", ".join(log_file_paths), e)
+            sys.exit(1)
+        print_formatted_results(
+            heapq.nlargest(args.top, matches, key=lambda entry: entry.duration)
+        )
+        sys.exit(0)
+
+    try:
+        summary = analyze_logs(
+            log_file_paths,
+            args.workers,
+            args.chunk_size_mb * 1024 * 1024,
+            LogSummary(
+                args.top, args.group_by, args.prefix_length, args.window_seconds
+            ),
+            args.mmap,
+            args.log_format,
+        )
+    except Exception as e:
+        _print_error(", ".join(log_file_paths), e)
+        sys.exit(1)
 
-    # Sort entries by duration in descending order and get the top ten
-    sorted_entries: List[LogEntry] = sorted(
-        entries, key=lambda x: x.duration, reverse=True
-    )[:10]
+    # Entries by duration in descending order, per group if requested
+    for group, group_entries in summary.slowest.groups().items():
+        if group is not None:
+            print(f"===== {args.group_by}: {group} =====\n")
+        print_formatted_results(group_entries)
 
-    print_formatted_results(sorted_entries)
+    if args.stats:
+        print(summary.latency.report())
@@ -0,0 +1,243 @@
+import os
+from datetime import datetime
+from itertools import chain, islice
+from typing import Iterable, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+from log_analyzer import (
+    MAX_PENDING_REQUESTS,
+    LogEntry,
+    expand_log_paths,
+    iter_log_file,
+    iter_mapped_log_file,
+)
+
+EXPORT_BATCH_SIZE = 65536
+DEFAULT_TABLE = "requests"
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+DUCKDB_EXTENSIONS = (".duckdb", ".db")
+
+
+def entry_schema(include_content: bool = True) -> "pa.Schema":
+    """
+    Returns the Arrow schema of exported entries.
+
+    :param include_content: Whether the request content is exported.
+    :return: The schema.
+    """
+    fields = [
+        ("source_file", pa.string()),
+        ("thread_id", pa.string()),
+        ("request_number", pa.int64()),
+        ("duration", pa.float64()),
+        ("timestamp", pa.timestamp("us")),
+    ]
+    if include_content:
+        fields.append(("request_content", pa.large_string()))
+    return pa.schema(fields)
+
+
+def iter_entry_batches(
+    entries: Iterable[LogEntry],
+    source_file: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    include_content: bool = True,
+) -> Iterator["pa.RecordBatch"]:
+    """
+    Groups entries into Arrow record batches, built column by column so that
+    only ``batch_size`` entries are held in memory at a time. Requires
+    ``pyarrow``.
+
+    :param entries: The entries, e.g. from ``iter_log_file``.
+    :param source_file: Path of the log the entries come from.
+    :param batch_size: Number of entries per batch.
+    :param include_content: Whether the request content is exported.
+    :return: Iterator over the batches.
+    """
+    if pa is None:
+        raise ImportError("Exporting log entries requires 'pyarrow'")
+    schema = entry_schema(include_content)
+    entries = iter(entries)
+    while True:
+        batch: List[LogEntry] = list(islice(entries, batch_size))
+        if not batch:
+            break
+        columns = [
+            pa.array([source_file] * len(batch), pa.string()),
+            pa.array([entry.thread_id for entry in batch], pa.string()),
+            pa.array([entry.request_number for entry in batch], pa.int64()),
+            pa.array([entry.duration for entry in batch], pa.float64()),
+            # Naive column holding the log's own wall-clock time, which
+            # parse_timestamp read as local time
+            pa.array(
+                [
+                    (
+                        None
+                        if entry.timestamp is None
+                        else datetime.fromtimestamp(entry.timestamp)
+                    )
+                    for entry in batch
+                ],
+                pa.timestamp("us"),
+            ),
+        ]
+        if include_content:
+            columns.append(
+                pa.array([entry.request_content for entry in batch], pa.large_string())
+            )
+        yield pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def iter_log_batches(
+    patterns: Iterable[str],
+    batch_size: int = EXPORT_BATCH_SIZE,
+    use_mmap: bool = False,
+    log_format: Optional[str] = None,
+    include_content: bool = True,
+    max_pending: int = MAX_PENDING_REQUESTS,
+) -> Iterator["pa.RecordBatch"]:
+    """
+    Parses log files one after the other into Arrow record batches.
+
+    :param patterns: Log file paths, directories or glob patterns.
+    :param batch_size: Number of entries per batch.
+    :param use_mmap: Whether to scan memory-mapped files with byte patterns.
+    :param log_format: Name of the logs' format; detected per file if omitted.
+    :param include_content: Whether the request content is exported.
+    :param max_pending: Maximum number of requests waiting for their duration.
+    :return: Iterator over the batches.
+    """
+    iter_entries = iter_mapped_log_file if use_mmap else iter_log_file
+    for path in expand_log_paths(patterns):
+        yield from iter_entry_batches(
+            iter_entries(path, max_pending, log_format),
+            path,
+            batch_size,
+            include_content,
+        )
+
+
+def write_parquet(
+    batches: Iterable["pa.RecordBatch"],
+    path: str,
+    schema: Optional["pa.Schema"] = None,
+) -> int:
+    """
+    Streams record batches to a Parquet file, one row group per batch.
+
+    :param batches: Batches sharing one schema.
+    :param path: Path of the Parquet file.
+    :param schema: Optional schema of the batches, so that a file is written
+        even without any batch; taken from the first batch otherwise.
+    :return: Number of rows written.
+    """
+    if pa is None:
+        raise ImportError("Exporting to Parquet requires 'pyarrow'")
+    count = 0
+    writer = pq.ParquetWriter(path, schema) if schema is not None else None
+    try:
+        for batch in batches:
+            if writer is None:
+                writer = pq.ParquetWriter(path, batch.schema)
+            writer.write_batch(batch)
+            count += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+def write_duckdb(
+    batches: Iterable["pa.RecordBatch"],
+    database: str,
+    table: str = DEFAULT_TABLE,
+    replace: bool = False,
+    schema: Optional["pa.Schema"] = None,
+) -> int:
+    """
+    Appends record batches to a DuckDB table, creating it from the first batch's
+    schema. Each batch is handed to DuckDB as an Arrow view, without copying it
+    through Python rows. Requires ``duckdb``.
+
+    :param batches: Batches sharing one schema.
+    :param database: Path of the DuckDB database file.
+    :param table: Name of the table.
+    :param replace: Whether to drop an existing table of that name first.
+    :param schema: Optional schema of the batches, so that the table is created
+        even without any batch; taken from the first batch otherwise.
+    :return: Number of rows written.
+    """
+    if duckdb is None:
+        raise ImportError("Exporting to DuckDB requires 'duckdb'")
+    quoted_table = '"' + table.replace('"', '""') + '"'
+    count = 0
+    created = False
+    connection = duckdb.connect(database)
+    try:
+        if replace:
+            connection.execute(f"DROP TABLE IF EXISTS {quoted_table}")
+        if schema is not None:
+            batches = chain([pa.RecordBatch.from_pylist([], schema=schema)], batches)
+        for batch in batches:
+            connection.register("entry_batch", batch)
+            if not created:
+                connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {quoted_table} AS "
+                    "SELECT * FROM entry_batch LIMIT 0"
+                )
+                created = True
+            connection.execute(f"INSERT INTO {quoted_table} SELECT * FROM entry_batch")
+            connection.unregister("entry_batch")
+            count += batch.num_rows
+    finally:
+        connection.close()
+    return count
+
+
+def export_logs(
+    patterns: Iterable[str],
+    output_path: str,
+    table: str = DEFAULT_TABLE,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    use_mmap: bool = False,
+    log_format: Optional[str] = None,
+    include_content: bool = True,
+) -> int:
+    """
+    Parses log files into a Parquet file or a DuckDB table, chosen by the
+    extension of ``output_path``, for SQL queries over the requests, e.g.
+    ``SELECT thread_id, quantile_cont(duration, 0.99) FROM requests GROUP BY 1``.
+
+    :param patterns: Log file paths, directories or glob patterns.
+    :param output_path: A .parquet or .duckdb file.
+    :param table: Name of the DuckDB table; replaced if it exists.
+    :param batch_size: Number of entries per batch.
+    :param use_mmap: Whether to scan memory-mapped files with byte patterns.
+    :param log_format: Name of the logs' format; detected per file if omitted.
+    :param include_content: Whether the request content is exported.
+    :return: Number of requests written.
+    """
+    extension = os.path.splitext(output_path)[1].lower()
+    if extension not in PARQUET_EXTENSIONS + DUCKDB_EXTENSIONS:
+        raise ValueError(
+            f"Unknown output format '{extension}', expected one of "
+            f"{PARQUET_EXTENSIONS + DUCKDB_EXTENSIONS}"
+        )
+    batches = iter_log_batches(
+        patterns, batch_size, use_mmap, log_format, include_content
+    )
+    schema = entry_schema(include_content) if pa is not None else None
+    if extension in PARQUET_EXTENSIONS:
+        return write_parquet(batches, output_path, schema)
+    return write_duckdb(batches, output_path, table, replace=True, schema=schema)
@@ -0,0 +1,220 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Pattern, Tuple
+
+DEFAULT_LOG_FORMAT = "request_blocks"
+# Bytes read from the start of a log to guess its format
+DETECT_SAMPLE_SIZE = 1024
+
+
+class LogFormat:
+    def __init__(
+        self,
+        name: str,
+        start: str,
+        block_end: str,
+        literals: Tuple[str, ...],
+        block_end_at_line_start: bool = True,
+        include_end_line: bool = False,
+        payload: Optional[str] = None,
+        done: Optional[str] = None,
+        mapped: Optional[bytes] = None,
+    ):
+        """
+        Describes one log dialect: how a request block starts and ends, where its
+        payload is and, optionally, how the line reporting its duration looks.
+
+        :param name: Name of the format, used by ``--log_format``.
+        :param start: Pattern of the line starting a block, with a ``thread``
+            group and an optional ``request`` group (requests are numbered in
+            order of appearance without it).
+        :param block_end: Literal text of the line ending a block.
+        :param literals: Literal strings found in every start (and done) line.
+            Other lines are skipped before any regex runs on them.
+        :param block_end_at_line_start: Whether ``block_end`` must start the line
+            rather than appear anywhere in it.
+        :param include_end_line: Whether the end line belongs to the block text.
+        :param payload: Optional pattern (run with DOTALL) whose first group is
+            the request content within the block text; the whole text otherwise.
+        :param done: Optional pattern of the line reporting a request's duration,
+            with ``thread``, ``request`` and ``duration`` groups. Without it,
+            requests are complete at the end of their block, with duration 0.0.
+        :param mapped: Optional byte pattern (run with DOTALL) matching a whole
+            block, with ``thread``, optional ``request`` and ``content`` groups,
+            or a done line, with ``done_thread``, ``done_request`` and
+            ``duration`` groups. Required for the mmap mode.
+        """
+        self.name = name
+        self.start = start
+        self.block_end = block_end
+        self.literals = literals
+        self.block_end_at_line_start = block_end_at_line_start
+        self.include_end_line = include_end_line
+        self.payload = payload
+        self.done = done
+        self.mapped = mapped
+
+
+class LiteralPrefilter:
+    def __init__(self, literals: Tuple[str, ...]):
+        """
+        Tells whether a line contains any of a set of literal strings.
+
+        A single literal is checked with ``in``; several are combined into one
+        alternation so that a line is scanned once whatever their number.
+
+        :param literals: The literal strings.
+        """
+        self.literals = literals
+        self._single = literals[0] if len(literals) == 1 else None
+        self._pattern = re.compile(
+            "|".join(re.escape(literal) for literal in sorted(literals, key=len))
+        )
+
+    def __call__(self, line: str) -> bool:
+        if self._single is not None:
+            return self._single in line
+        return self._pattern.search(line) is not None
+
+
+class CompiledLogFormat:
+    def __init__(self, log_format: LogFormat):
+        """
+        A LogFormat with its patterns compiled. Get instances through
+        ``compile_log_format``, which caches them.
+
+        :param log_format: The format.
+        """
+        self.name = log_format.name
+        self.start: Pattern[str] = re.compile(log_format.start)
+        self.has_request_number = "request" in self.start.groupindex
+        self.block_end = log_format.block_end
+        self.block_end_at_line_start = log_format.block_end_at_line_start
+        self.include_end_line = log_format.include_end_line
+        self.payload: Optional[Pattern[str]] = (
+            re.compile(log_format.payload, re.DOTALL) if log_format.payload else None
+        )
+        self.done: Optional[Pattern[str]] = (
+            re.compile(log_format.done) if log_format.done else None
+        )
+        self.mapped: Optional[Pattern[bytes]] = (
+            re.compile(log_format.mapped, re.DOTALL) if log_format.mapped else None
+        )
+        self.prefilter = LiteralPrefilter(log_format.literals)
+
+    def is_block_end(self, line: str) -> bool:
+        """
+        Tells whether a line ends the current block.
+        """
+        if self.block_end_at_line_start:
+            return line.startswith(self.block_end)
+        return self.block_end in line
+
+    def extract_payload(self, text: str) -> str:
+        """
+        Returns the stripped request content of a block's text.
+        """
+        if self.payload is not None:
+            match = self.payload.search(text)
+            if match:
+                text = match.group(1)
+        return text.strip()
+
+
+LOG_FORMATS: Dict[str, LogFormat] = {}
+
+
+def register_log_format(log_format: LogFormat):
+    """
+    Adds a format to the registry, replacing any format of the same name.
+
+    :param log_format: The format.
+    """
+    LOG_FORMATS[log_format.name] = log_format
+    compile_log_format.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def compile_log_format(name: str) -> CompiledLogFormat:
+    """
+    Returns the compiled matchers of a registered format, compiling them once
+    per process.
+
+    :param name: Name of the format.
+    :return: The compiled format.
+    :raises ValueError: If no format of that name is registered.
+    """
+    if name not in LOG_FORMATS:
+        raise ValueError(
+            f"Unknown log format '{name}', expected one of {sorted(LOG_FORMATS)}"
+        )
+    return CompiledLogFormat(LOG_FORMATS[name])
+
+
+def detect_log_format(file_path: str, sample_size: int = DETECT_SAMPLE_SIZE) -> str:
+    """
+    Guesses the format of a log from its first bytes: the format whose start and
+    done patterns match the most lines of the sample wins.
+
+    :param file_path: Path to the log file.
+    :param sample_size: Number of bytes sampled.
+    :return: Name of the detected format, or the default format if none matches.
+    """
+    with open(file_path, "rb") as file:
+        sample = file.read(sample_size).decode("utf-8", errors="replace")
+    lines: List[str] = sample.splitlines()
+
+    best_name, best_score = DEFAULT_LOG_FORMAT, 0
+    for name in LOG_FORMATS:
+        log_format = compile_log_format(name)
+        score = 0
+        for line in lines:
+            if not log_format.prefilter(line):
+                continue
+            if log_format.start.search(line) or (
+                log_format.done is not None and log_format.done.search(line)
+            ):
+                score += 1
+        if score > best_score:
+            best_name, best_score = name, score
+    return best_name
+
+
+# Service logs: "-------[thread] Request [n] ------" blocks ended by a line of
+# dashes, and "[thread]The Request [n] is done in Xs" lines
+register_log_format(
+    LogFormat(
+        name="request_blocks",
+        start=r"-------\[(?P<thread>.*?)\] Request \[(?P<request>\d+)\] ------$",
+        block_end="---------------------------",
+        literals=("Request [",),
+        done=(
+            r"\[(?P<thread>.*?)\]The Request \[(?P<request>\d+)\] "
+            r"is done in (?P<duration>[\d.]+)s"
+        ),
+        mapped=(
+            rb"-------\[(?P<thread>[^\n]*?)\] Request \[(?P<request>\d+)\] ------"
+            rb"\r?\n(?P<content>.*?)\r?\n---------------------------"
+            rb"|\[(?P<done_thread>[^\n]*?)\]The Request \[(?P<done_request>\d+)\] "
+            rb"is done in (?P<duration>[\d.]+)s"
+        ),
+    )
+)
+
+# Thread-tagged XML documents: "thread [id] running", an XML declaration and
+# an <a>...</a> element holding the payload; no durations
+register_log_format(
+    LogFormat(
+        name="xml_threads",
+        start=r"thread \[(?P<thread>.*?)\] running",
+        block_end="</a>",
+        literals=("] running",),
+        block_end_at_line_start=False,
+        include_end_line=True,
+        payload=r"<a>(.*?)</a>",
+        mapped=(
+            rb"thread \[(?P<thread>[^\n]*?)\] running\s*"
+            rb'<\?xml standalone="yes"\?>\s*<a>(?P<content>.*?)</a>'
+        ),
+    )
+)
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import sys
+from typing import BinaryIO, Optional
+
+from log_analyzer import INDEX_SUFFIX
+from log_table import LogEntryTable
+
+INDEX_MAGIC = b"LOGIDX2\n"
+# Columns of LogEntryTable written to the index, in file order
+INDEX_COLUMNS = (
+    "thread_ids",
+    "request_numbers",
+    "durations",
+    "timestamps",
+    "content_offsets",
+    "content_lengths",
+)
+
+
+def index_path_for(log_path: str, index_dir: Optional[str] = None) -> str:
+    """
+    Returns where the sidecar index of a log file is stored.
+
+    :param log_path: Path to the log file.
+    :param index_dir: Optional directory for indexes; defaults to next to the log.
+        Index names there include a hash of the log's absolute path, so that
+        logs with the same name in different directories do not collide.
+    :return: Path of the index file.
+    """
+    if index_dir is None:
+        return log_path + INDEX_SUFFIX
+    digest = hashlib.sha1(os.path.abspath(log_path).encode()).hexdigest()[:16]
+    return os.path.join(
+        index_dir, f"{os.path.basename(log_path)}.{digest}{INDEX_SUFFIX}"
+    )
+
+
+def save_index(
+    table: LogEntryTable,
+    index_path: str,
+    log_stat: Optional[os.stat_result] = None,
+):
+    """
+    Writes a table to a compact binary index: a JSON header line with the log's
+    size and mtime and the thread names, followed by the raw column arrays.
+
+    :param table: The table of the log file.
+    :param index_path: Path of the index file.
+    :param log_stat: ``os.stat`` of the log taken before it was parsed; the log
+        is stat'ed now if omitted.
+    """
+    stat = log_stat or os.stat(table.path)
+    header = {
+        "log_path": os.path.abspath(table.path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "rows": len(table),
+        "log_format": table.log_format,
+        "byteorder": sys.byteorder,
+        "itemsizes": [getattr(table, column).itemsize for column in INDEX_COLUMNS],
+        "thread_names": table.thread_names,
+    }
+    temp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(INDEX_MAGIC)
+        file.write(json.dumps(header).encode() + b"\n")
+        for column in INDEX_COLUMNS:
+            getattr(table, column).tofile(file)
+    os.replace(temp_path, index_path)
+
+
+def load_index(
+    log_path: str, index_path: Optional[str] = None
+) -> Optional[LogEntryTable]:
+    """
+    Loads the index of a log file if it is still up to date.
+
+    :param log_path: Path to the log file.
+    :param index_path: Path of the index file; defaults to the sidecar path.
+    :return: The table, or None if there is no index, if it belongs to another
+        log or is corrupt, or if the log has changed since it was written.
+    """
+    index_path = index_path or index_path_for(log_path)
+    try:
+        file = open(index_path, "rb")
+    except FileNotFoundError:
+        return None
+    with file:
+        if file.readline() != INDEX_MAGIC:
+            return None
+        try:
+            return _read_index(file, log_path)
+        except (ValueError, KeyError, TypeError, EOFError):
+            # Truncated or corrupt index: it is rebuilt
+            return None
+
+
+def _read_index(file: BinaryIO, log_path: str) -> Optional[LogEntryTable]:
+    header = json.loads(file.readline())
+    if header["log_path"] != os.path.abspath(log_path):
+        return None
+    stat = os.stat(log_path)
+    if (header["size"], header["mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+        return None
+
+    table = LogEntryTable(log_path, header["log_format"])
+    itemsizes = [getattr(table, column).itemsize for column in INDEX_COLUMNS]
+    if header["itemsizes"] != itemsizes:
+        return None
+    for thread_name in header["thread_names"]:
+        table.intern_thread(thread_name)
+    for column in INDEX_COLUMNS:
+        values = getattr(table, column)
+        values.fromfile(file, header["rows"])
+        if header["byteorder"] != sys.byteorder:
+            values.byteswap()
+    return table
+
+
+def open_log_table(
+    log_path: str,
+    index_dir: Optional[str] = None,
+    rebuild: bool = False,
+    log_format: Optional[str] = None,
+) -> LogEntryTable:
+    """
+    Returns the table of a log file, from its index when it is up to date.
+    Otherwise the log is parsed and the index (re)written.
+
+    :param log_path: Path to the log file.
+    :param index_dir: Optional directory for indexes; defaults to next to the log.
+    :param rebuild: Whether to ignore an existing index.
+    :param log_format: Name of the log's format; an index built with another
+        format is rebuilt. Detected if omitted.
+    :return: The table.
+    """
+    index_path = index_path_for(log_path, index_dir)
+    table = None if rebuild else load_index(log_path, index_path)
+    if table is not None and log_format not in (None, table.log_format):
+        table = None
+    if table is None:
+        log_stat = os.stat(log_path)
+        table = LogEntryTable.from_log_file(log_path, log_format=log_format)
+        save_index(table, index_path, log_stat)
+    return table
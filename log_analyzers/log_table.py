@@ -0,0 +1,254 @@
+import heapq
+import math
+from array import array
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from log_analyzer import (
+    MAX_PENDING_REQUESTS,
+    LogEntry,
+    RequestLogParser,
+    map_log_file,
+    scan_mapped_range,
+)
+from log_formats import DEFAULT_LOG_FORMAT, detect_log_format
+
+
+class LogEntryView(LogEntry):
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: "LogEntryTable", row: int):
+        """
+        Row of a LogEntryTable with the LogEntry API. Values are read from the
+        table's columns on access; the request content is read from the log file.
+
+        :param table: The table.
+        :param row: Index of the row.
+        """
+        self._table = table
+        self._row = row
+
+    @property
+    def thread_id(self) -> str:
+        return self._table.thread_names[self._table.thread_ids[self._row]]
+
+    @property
+    def request_number(self) -> int:
+        return self._table.request_numbers[self._row]
+
+    @property
+    def request_content(self) -> str:
+        return self._table.content(self._row)
+
+    @property
+    def duration(self) -> float:
+        return self._table.durations[self._row]
+
+    @property
+    def timestamp(self) -> Optional[float]:
+        timestamp = self._table.timestamps[self._row]
+        return None if math.isnan(timestamp) else timestamp
+
+    def to_entry(self) -> LogEntry:
+        """
+        Returns a standalone LogEntry with the content loaded.
+        """
+        return LogEntry(
+            self.thread_id,
+            self.request_number,
+            self.request_content,
+            self.duration,
+            self.timestamp,
+        )
+
+
+class LogEntryTable:
+    def __init__(self, path: str, log_format: str = DEFAULT_LOG_FORMAT):
+        """
+        Columnar store of the requests of one log file.
+
+        Thread ids are interned: each row stores a small integer indexing
+        ``thread_names``. Request numbers, durations, timestamps and the byte span
+        of the request content are kept in typed arrays, about 40 bytes per row.
+        The content itself stays in the log file and is read when a row's
+        ``request_content`` is accessed.
+
+        :param path: Path to the log file the content offsets refer to.
+        :param log_format: Name of the log's format.
+        """
+        self.path = path
+        self.log_format = log_format
+        self.thread_names: List[str] = []
+        self._thread_index: Dict[str, int] = {}
+        self.thread_ids = array("I")
+        self.request_numbers = array("q")
+        self.durations = array("d")
+        # NaN when the "is done" line had no timestamp
+        self.timestamps = array("d")
+        self.content_offsets = array("q")
+        self.content_lengths = array("I")
+        self._file: Optional[BinaryIO] = None
+
+    @classmethod
+    def from_log_file(
+        cls,
+        path: str,
+        max_pending: int = MAX_PENDING_REQUESTS,
+        log_format: Optional[str] = None,
+    ) -> "LogEntryTable":
+        """
+        Builds the table of a log file in one memory-mapped scan.
+
+        :param path: Path to the log file.
+        :param max_pending: Maximum number of requests waiting for their duration.
+        :param log_format: Name of the log's format; detected if omitted.
+        :return: The table.
+        """
+        table = cls(path, log_format or detect_log_format(path))
+        parser = RequestLogParser(max_pending, log_format=table.log_format)
+        with map_log_file(path) as data:
+            if data is not None:
+                for entry in scan_mapped_range(
+                    data, 0, len(data), parser, content_spans=True
+                ):
+                    table._append_spanned(entry)
+        for entry in parser.finish():
+            table._append_spanned(entry)
+        return table
+
+    def _append_spanned(self, entry: LogEntry):
+        start, end = entry.request_content
+        self.append(
+            entry.thread_id,
+            entry.request_number,
+            entry.duration,
+            start,
+            end - start,
+            entry.timestamp,
+        )
+
+    def intern_thread(self, thread_id: str) -> int:
+        """
+        Returns the small integer standing for a thread id.
+        """
+        index = self._thread_index.get(thread_id)
+        if index is None:
+            index = self._thread_index[thread_id] = len(self.thread_names)
+            self.thread_names.append(thread_id)
+        return index
+
+    def append(
+        self,
+        thread_id: str,
+        request_number: int,
+        duration: float,
+        content_offset: int,
+        content_length: int,
+        timestamp: Optional[float] = None,
+    ):
+        """
+        Adds a row.
+
+        :param thread_id: The request's thread.
+        :param request_number: The request number.
+        :param duration: The request's duration in seconds.
+        :param content_offset: Byte offset of the request content in the file.
+        :param content_length: Length of the request content in bytes.
+        :param timestamp: POSIX time of the "is done" line, if known.
+        """
+        self.thread_ids.append(self.intern_thread(thread_id))
+        self.request_numbers.append(request_number)
+        self.durations.append(duration)
+        self.timestamps.append(math.nan if timestamp is None else timestamp)
+        self.content_offsets.append(content_offset)
+        self.content_lengths.append(content_length)
+
+    def __len__(self) -> int:
+        return len(self.durations)
+
+    def __getitem__(self, row: int) -> LogEntryView:
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return LogEntryView(self, row)
+
+    def __iter__(self) -> Iterator[LogEntryView]:
+        for row in range(len(self)):
+            yield LogEntryView(self, row)
+
+    def content(self, row: int) -> str:
+        """
+        Reads the request content of a row from the log file.
+        """
+        if self._file is None:
+            self._file = open(self.path, "rb")
+        self._file.seek(self.content_offsets[row])
+        data = self._file.read(self.content_lengths[row])
+        return data.decode("utf-8", errors="replace").strip()
+
+    def close(self):
+        """
+        Closes the log file opened to read request contents.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "LogEntryTable":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def select(
+        self,
+        thread_id: Optional[str] = None,
+        min_duration: Optional[float] = None,
+    ) -> List[int]:
+        """
+        Finds the rows matching a filter, vectorised with NumPy when available.
+
+        :param thread_id: Optional thread the requests must belong to.
+        :param min_duration: Optional minimum duration in seconds.
+        :return: Indexes of the matching rows.
+        """
+        thread = None
+        if thread_id is not None:
+            thread = self._thread_index.get(thread_id)
+            if thread is None:
+                return []
+
+        if np is not None:
+            mask = np.ones(len(self), dtype=bool)
+            if thread is not None:
+                mask &= np.frombuffer(self.thread_ids, dtype=np.uint32) == thread
+            if min_duration is not None:
+                mask &= np.frombuffer(self.durations) >= min_duration
+            return np.flatnonzero(mask).tolist()
+
+        return [
+            row
+            for row in range(len(self))
+            if (thread is None or self.thread_ids[row] == thread)
+            and (min_duration is None or self.durations[row] >= min_duration)
+        ]
+
+    def slowest(self, k: int, rows: Optional[List[int]] = None) -> List[LogEntryView]:
+        """
+        Returns the ``k`` slowest requests, slowest first.
+
+        :param k: Number of requests.
+        :param rows: Optional rows to choose from, e.g. the result of ``select``.
+        :return: Views of the slowest rows.
+        """
+        candidates = range(len(self)) if rows is None else rows
+        durations = self.durations
+        return [
+            LogEntryView(self, row)
+            for row in heapq.nlargest(k, candidates, key=durations.__getitem__)
+        ]
@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import os
+import signal
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from pipeline import (
+    CommandOutput,
+    Job,
+    JobResult,
+    Pipeline,
+    PipelineExecutor,
+    Stage,
+    StageScheduler,
+)
+from output_capture import CHUNK_SIZE, LineSplitter, OutputBuffer
+from job_history import JobHistory
+from notifications import FailureNotifier
+from result_cache import ResultCache
+
+
+class AsyncPipelineExecutor(PipelineExecutor):
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        max_workers: Optional[int] = None,
+        max_parallel_jobs: Optional[int] = None,
+        job_timeout: Optional[float] = None,
+        max_output_bytes: Optional[int] = None,
+        spill_threshold: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        result_cache: Optional[ResultCache] = None,
+        history: Optional[JobHistory] = None,
+        on_job_finished: Optional[Callable[[JobResult], Awaitable[None]]] = None,
+        notifier: Optional[FailureNotifier] = None,
+    ):
+        """
+        Executes a pipeline on an asyncio event loop, running each job as an
+        asyncio subprocess instead of blocking a thread per job.
+
+        Use ``await executor.run()`` from inside a running loop (e.g. a FastAPI
+        endpoint or websocket handler), or ``executor.execute()`` from sync code.
+
+        :param pipeline: The pipeline to be executed.
+        :param max_workers: Maximum number of stages running at the same time.
+        :param max_parallel_jobs: Number of job slots shared by all running stages.
+            Each job takes ``stage.weight`` slots.
+        :param job_timeout: Optional number of seconds after which a job is killed.
+        :param max_output_bytes: Default cap on the bytes kept per job output stream.
+        :param spill_threshold: Optional in-memory byte count per job output stream
+            above which the full output is written to a file in ``spill_dir``.
+        :param spill_dir: Directory for spilled job output; see ``PipelineExecutor``.
+        :param result_cache: Optional cache of successful job results.
+        :param history: Optional store of past job durations, used for ordering.
+        :param on_job_finished: Optional coroutine function called with each job
+            result, e.g. to push progress to a websocket client.
+        :param notifier: Background dispatcher for failure emails; see
+            ``PipelineExecutor``.
+        """
+        super().__init__(
+            pipeline,
+            max_workers=max_workers,
+            max_parallel_jobs=max_parallel_jobs,
+            max_output_bytes=max_output_bytes,
+            spill_threshold=spill_threshold,
+            spill_dir=spill_dir,
+            result_cache=result_cache,
+            history=history,
+            notifier=notifier,
+        )
+        self.job_timeout: Optional[float] = job_timeout
+        self.on_job_finished = on_job_finished
+        self._tasks: Set[asyncio.Task] = set()
+        self._job_slots: Optional[asyncio.Semaphore] = None
+        self._slot_lock: Optional[asyncio.Lock] = None
+
+    def execute(self):
+        """
+        Runs the pipeline to completion on a new event loop.
+        """
+        asyncio.run(self.run())
+
+    def cancel(self):
+        """
+        Cancels every running stage. Their subprocesses are killed and ``run()``
+        raises ``asyncio.CancelledError``.
+        """
+        for task in list(self._tasks):
+            task.cancel()
+
+    async def run(self):
+        """
+        Executes the stages in the pipeline, respecting dependencies.
+
+        :raises PipelineValidationError: If dependencies are unknown or cyclic.
+        """
+        scheduler = StageScheduler(self.pipeline, self.stage_estimator())
+        self._job_slots = asyncio.Semaphore(self.job_slots.capacity)
+        self._slot_lock = asyncio.Lock()
+
+        running: Dict[asyncio.Task, Stage] = {}
+        try:
+            while scheduler.has_ready() or running:
+                while scheduler.has_ready() and len(running) < self.max_workers:
+                    stage = scheduler.pop_ready()
+                    task = asyncio.create_task(self.run_stage(stage))
+                    running[task] = stage
+                    self._tasks.add(task)
+
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    stage = running.pop(task)
+                    self._tasks.discard(task)
+                    task.result()
+                    scheduler.complete(stage)
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            self._tasks.clear()
+            self._end_notifications()
+
+    async def run_stage(self, stage: Stage):
+        """
+        Executes a single stage, either sequentially or in parallel.
+        """
+        logging.info(f"Executing Stage: {stage.name}")
+        if stage.parallel and stage.jobs:
+            stage_slots = asyncio.Semaphore(stage.max_parallel or len(stage.jobs))
+
+            async def run_limited(job: Job):
+                async with stage_slots:
+                    await self.run_job(job, stage)
+
+            await asyncio.gather(*(run_limited(job) for job in self.order_jobs(stage)))
+        else:
+            for job in stage.jobs:
+                await self.run_job(job, stage)
+
+    async def run_job(self, job: Job, stage: Stage) -> JobResult:
+        """
+        Executes a single job as an asyncio subprocess and stores the result.
+        """
+        logging.info(f"  Executing Job: {job.name}")
+        fingerprint, output = None, None
+        if self.result_cache is not None:
+            # Hashing input files is blocking file I/O
+            fingerprint, output = await asyncio.to_thread(self.cache_lookup, job)
+        start_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if output is None:
+            weight = await self._acquire_slots(stage.weight)
+            try:
+                start_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                started = time.monotonic()
+                output = await self._run_command(job)
+                if output.duration is None:
+                    output.duration = time.monotonic() - started
+            finally:
+                for _ in range(weight):
+                    self._job_slots.release()
+            self.cache_store(fingerprint, output)
+
+        job_result = self.record_result(job, stage, output, start_time)
+        if self.on_job_finished is not None:
+            await self.on_job_finished(job_result)
+        return job_result
+
+    async def _acquire_slots(self, weight: int) -> int:
+        # Weighted jobs take their slots one at a time under a lock, so two heavy
+        # jobs can never each hold part of what the other needs.
+        weight = max(1, min(weight, self.job_slots.capacity))
+        async with self._slot_lock:
+            for _ in range(weight):
+                await self._job_slots.acquire()
+        return weight
+
+    async def _run_command(self, job: Job) -> CommandOutput:
+        max_output_bytes = job.max_output_bytes or self.max_output_bytes
+        stdout = OutputBuffer(
+            max_output_bytes, self.spill_threshold, self.spill_dir, ".stdout.log"
+        )
+        stderr = OutputBuffer(
+            max_output_bytes, self.spill_threshold, self.spill_dir, ".stderr.log"
+        )
+        process = await asyncio.create_subprocess_shell(
+            job.command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=job.environment if job.environment else os.environ.copy(),
+            # Own process group, so a timeout also kills what the shell started
+            start_new_session=os.name != "nt",
+        )
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(
+                    _pump(
+                        process.stdout,
+                        stdout,
+                        lambda line: logging.info(f"  [STDOUT] {line}"),
+                    ),
+                    _pump(
+                        process.stderr,
+                        stderr,
+                        lambda line: logging.error(f"  [STDERR] {line}"),
+                    ),
+                    process.wait(),
+                ),
+                timeout=self.job_timeout,
+            )
+        except asyncio.TimeoutError:
+            logging.error(f"  Job '{job.name}' timed out after {self.job_timeout}s")
+            stderr.write(f"\nJob timed out after {self.job_timeout}s\n".encode())
+        finally:
+            if process.returncode is None:
+                _kill_process_tree(process)
+                await process.wait()
+            stdout.close()
+            stderr.close()
+        return CommandOutput.from_buffers(stdout, stderr, process.returncode)
+
+
+def _kill_process_tree(process: asyncio.subprocess.Process):
+    if os.name == "nt":
+        process.kill()
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def _pump(
+    stream: asyncio.StreamReader,
+    buffer: OutputBuffer,
+    on_line: Callable[[str], None],
+):
+    splitter = LineSplitter(on_line)
+    while True:
+        data = await stream.read(CHUNK_SIZE)
+        if not data:
+            break
+        buffer.write(data)
+        splitter.feed(data)
+    splitter.flush()
@@ -0,0 +1,474 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import uuid
+import weakref
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Set
+
+from async_executor import AsyncPipelineExecutor
+from pipeline import CommandOutput, Job, Pipeline, run_command
+
+
+class RunnerDisconnected(Exception):
+    """
+    Raised for jobs that were in flight on a runner when it went away.
+    """
+
+
+class RunnerChannel(ABC):
+    def __init__(self, runner_id: str, capabilities: Optional[Dict] = None):
+        """
+        Connection to a test runner that executes jobs on the executor's behalf.
+
+        Messages are dictionaries. The executor sends
+        ``{"type": "job", "job_id", "name", "command", "environment"}`` and the
+        runner answers with ``{"type": "result", "job_id", "stdout", "stderr",
+        "return_code"}``. When a job times out, the executor sends
+        ``{"type": "cancel", "job_id"}``; the runner should stop the job and still
+        answer with its result.
+
+        :param runner_id: Identifier of the runner.
+        :param capabilities: The runner's capabilities, matched against
+            ``Job.requirements``.
+        """
+        self.runner_id = runner_id
+        self.capabilities: Dict = capabilities or {}
+
+    @abstractmethod
+    async def send(self, message: Dict) -> None:
+        """
+        Send a message to the runner.
+        """
+        pass
+
+    @abstractmethod
+    async def receive(self) -> Optional[Dict]:
+        """
+        Wait for the next message from the runner; None once it has disconnected.
+        """
+        pass
+
+    async def close(self) -> None:
+        """
+        Release the connection. Does nothing by default.
+        """
+        pass
+
+    def satisfies(self, requirements: Dict) -> bool:
+        """
+        Checks whether the runner's capabilities meet a job's requirements.
+
+        A list requirement is met when every item appears in the capability
+        (e.g. required software); other values must be equal.
+
+        :param requirements: The job's requirements.
+        :return: Whether the runner can execute the job.
+        """
+        for key, required in requirements.items():
+            available = self.capabilities.get(key)
+            if isinstance(required, list):
+                if not isinstance(available, list) or not set(required) <= set(
+                    available
+                ):
+                    return False
+            elif available != required:
+                return False
+        return True
+
+
+class ResultDispatcher:
+    def __init__(self, incoming: asyncio.Queue):
+        """
+        Single reader of the messages received from a runner, shared by every
+        channel to that runner. Each result goes to the channel that sent its job;
+        results of jobs no channel is waiting for, e.g. late replies to cancelled
+        jobs, are dropped. The end of the stream (None) goes to every channel.
+
+        :param incoming: Queue of messages received from the runner.
+        """
+        self.incoming = incoming
+        self.disconnected = False
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._owners: Dict[str, asyncio.Queue] = {}
+        self._reader: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        """
+        Returns a new queue receiving the results of the jobs passed to ``expect``
+        with it. Must be called from the event loop the runner is served on.
+        """
+        subscriber: asyncio.Queue = asyncio.Queue()
+        if self.disconnected:
+            subscriber.put_nowait(None)
+            return subscriber
+        self._subscribers.add(subscriber)
+        if self._reader is None:
+            self._reader = asyncio.create_task(self._read())
+        return subscriber
+
+    def unsubscribe(self, subscriber: asyncio.Queue):
+        self._subscribers.discard(subscriber)
+        for job_id in [
+            job_id for job_id, owner in self._owners.items() if owner is subscriber
+        ]:
+            del self._owners[job_id]
+
+    def expect(self, job_id: str, subscriber: asyncio.Queue):
+        """
+        Routes the result of a job to a subscriber.
+        """
+        self._owners[job_id] = subscriber
+
+    async def _read(self):
+        while True:
+            message = await self.incoming.get()
+            if message is None:
+                self.disconnected = True
+                for subscriber in self._subscribers:
+                    subscriber.put_nowait(None)
+                return
+            owner = self._owners.pop(message.get("job_id"), None)
+            if owner is not None:
+                owner.put_nowait(message)
+
+
+# One dispatcher per queue of received messages, i.e. per runner connection
+_dispatchers: "weakref.WeakKeyDictionary[asyncio.Queue, ResultDispatcher]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def dispatcher_for(incoming: asyncio.Queue) -> ResultDispatcher:
+    """
+    Returns the dispatcher reading a queue of received messages, creating it on
+    first use.
+    """
+    dispatcher = _dispatchers.get(incoming)
+    if dispatcher is None:
+        dispatcher = _dispatchers[incoming] = ResultDispatcher(incoming)
+    return dispatcher
+
+
+class WebSocketRunnerChannel(RunnerChannel):
+    def __init__(
+        self,
+        runner_id: str,
+        websocket,
+        incoming: asyncio.Queue,
+        capabilities: Optional[Dict] = None,
+    ):
+        """
+        Runner connected to ``test_runner_server`` over its websocket.
+
+        The server's websocket endpoint owns the receive loop and puts each decoded
+        result message on ``incoming`` (and None when the runner disconnects).
+        Several executors may share the runner: a ``ResultDispatcher`` hands each
+        of them the results of its own jobs.
+
+        :param runner_id: Identifier of the runner.
+        :param websocket: The runner's FastAPI ``WebSocket``.
+        :param incoming: Queue of messages received from the runner.
+        :param capabilities: The runner's registered capabilities.
+        """
+        super().__init__(runner_id, capabilities)
+        self.websocket = websocket
+        self.dispatcher = dispatcher_for(incoming)
+        self._results: Optional[asyncio.Queue] = None
+
+    def _subscription(self) -> asyncio.Queue:
+        if self._results is None:
+            self._results = self.dispatcher.subscribe()
+        return self._results
+
+    async def send(self, message: Dict) -> None:
+        if message.get("type") == "job":
+            self.dispatcher.expect(message["job_id"], self._subscription())
+        await self.websocket.send_text(json.dumps(message))
+
+    async def receive(self) -> Optional[Dict]:
+        return await self._subscription().get()
+
+    async def close(self) -> None:
+        if self._results is not None:
+            self.dispatcher.unsubscribe(self._results)
+
+
+def channels_from_connections(
+    active_connections: Dict,
+    runners_details: Dict,
+    incoming_messages: Dict[object, asyncio.Queue],
+) -> List[WebSocketRunnerChannel]:
+    """
+    Builds channels for every runner currently connected to ``test_runner_server``.
+
+    :param active_connections: The server's runner id -> websocket map.
+    :param runners_details: The server's runner id -> ``Runner`` map.
+    :param incoming_messages: The server's runner id -> received message queue map.
+    :return: One channel per connected runner.
+    """
+    channels = []
+    for runner_id, websocket in active_connections.items():
+        runner = runners_details.get(runner_id)
+        channels.append(
+            WebSocketRunnerChannel(
+                runner_id,
+                websocket,
+                incoming_messages.setdefault(runner_id, asyncio.Queue()),
+                runner.capabilities if runner else None,
+            )
+        )
+    return channels
+
+
+class LocalProcessRunner(RunnerChannel):
+    def __init__(self, runner_id: str, capabilities: Optional[Dict] = None):
+        """
+        Stand-in runner executing jobs in a local worker process. It cannot stop
+        a running job, so a cancelled job holds its slot until it has finished.
+
+        :param runner_id: Identifier of the runner.
+        :param capabilities: Capabilities the runner advertises.
+        """
+        super().__init__(runner_id, capabilities)
+        self._jobs = multiprocessing.Queue()
+        self._results = multiprocessing.Queue()
+        self.process = multiprocessing.Process(
+            target=_local_runner_loop, args=(self._jobs, self._results), daemon=True
+        )
+        self.process.start()
+
+    async def send(self, message: Dict) -> None:
+        self._jobs.put(message)
+
+    async def receive(self) -> Optional[Dict]:
+        while True:
+            try:
+                return await asyncio.to_thread(self._results.get, True, 0.2)
+            except queue.Empty:
+                if not self.process.is_alive():
+                    return None
+
+    async def close(self) -> None:
+        if self.process.is_alive():
+            self._jobs.put(None)
+            await asyncio.to_thread(self.process.join, 5)
+        if self.process.is_alive():
+            self.process.kill()
+
+
+def _local_runner_loop(jobs: multiprocessing.Queue, results: multiprocessing.Queue):
+    for message in iter(jobs.get, None):
+        if message.get("type") != "job":
+            continue
+        output = run_command(
+            message["command"], {**os.environ, **message.get("environment", {})}
+        )
+        results.put(
+            {
+                "type": "result",
+                "job_id": message["job_id"],
+                "stdout": output.stdout,
+                "stderr": output.stderr,
+                "return_code": output.return_code,
+            }
+        )
+
+
+class DistributedPipelineExecutor(AsyncPipelineExecutor):
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        runners: List[RunnerChannel],
+        slots_per_runner: int = 1,
+        **kwargs,
+    ):
+        """
+        Executes a pipeline by sharding its jobs across remote test runners.
+
+        Each job is sent to the least busy connected runner whose capabilities
+        satisfy ``Job.requirements``. Jobs in flight on a runner that disconnects,
+        or that a job cannot be sent to, are reassigned to the remaining runners.
+        A job that times out is cancelled on its runner. Results are gathered
+        here, exactly as if the jobs had run locally.
+
+        :param pipeline: The pipeline to be executed.
+        :param runners: Channels to the runners.
+        :param slots_per_runner: Number of jobs each runner executes at once.
+        :param kwargs: Further options of ``AsyncPipelineExecutor``. The global job
+            limit defaults to the total number of runner slots.
+        """
+        kwargs.setdefault("max_parallel_jobs", max(1, len(runners) * slots_per_runner))
+        super().__init__(pipeline, **kwargs)
+        self.runners: List[RunnerChannel] = runners
+        self.slots_per_runner = slots_per_runner
+        self._load: Dict[str, int] = {}
+        self._in_flight: Dict[str, Dict[str, asyncio.Future]] = {}
+        self._runner_changed: Optional[asyncio.Condition] = None
+        self._pending_releases: Set[asyncio.Task] = set()
+
+    async def run(self):
+        """
+        Executes the pipeline on the runners, then closes their channels.
+        """
+        self._runner_changed = asyncio.Condition()
+        self._load = {runner.runner_id: 0 for runner in self.runners}
+        self._in_flight = {runner.runner_id: {} for runner in self.runners}
+        readers = [
+            asyncio.create_task(self._read_results(runner)) for runner in self.runners
+        ]
+        try:
+            await super().run()
+        finally:
+            tasks = readers + list(self._pending_releases)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await asyncio.gather(
+                *(runner.close() for runner in self.runners), return_exceptions=True
+            )
+
+    async def _read_results(self, runner: RunnerChannel):
+        while True:
+            message = await runner.receive()
+            if message is None:
+                await self._drop_runner(runner)
+                return
+            if message.get("type") != "result":
+                continue
+            in_flight = self._in_flight.get(runner.runner_id, {})
+            future = in_flight.pop(message["job_id"], None)
+            if future is not None and not future.done():
+                future.set_result(message)
+
+    async def _drop_runner(self, runner: RunnerChannel):
+        async with self._runner_changed:
+            if runner.runner_id not in self._load:
+                return
+            logging.error(f"Runner '{runner.runner_id}' disconnected")
+            del self._load[runner.runner_id]
+            for future in self._in_flight.pop(runner.runner_id, {}).values():
+                if not future.done():
+                    future.set_exception(RunnerDisconnected(runner.runner_id))
+            self._runner_changed.notify_all()
+
+    async def _acquire_runner(self, job: Job) -> Optional[RunnerChannel]:
+        async with self._runner_changed:
+            while True:
+                eligible = [
+                    runner
+                    for runner in self.runners
+                    if runner.runner_id in self._load
+                    and runner.satisfies(job.requirements)
+                ]
+                if not eligible:
+                    return None
+                free = [
+                    runner
+                    for runner in eligible
+                    if self._load[runner.runner_id] < self.slots_per_runner
+                ]
+                if free:
+                    runner = min(free, key=lambda r: self._load[r.runner_id])
+                    self._load[runner.runner_id] += 1
+                    return runner
+                await self._runner_changed.wait()
+
+    async def _release_runner(self, runner: RunnerChannel):
+        async with self._runner_changed:
+            if runner.runner_id in self._load:
+                self._load[runner.runner_id] -= 1
+            self._runner_changed.notify_all()
+
+    async def _run_command(self, job: Job) -> CommandOutput:
+        environment = {
+            key: value
+            for key, value in (job.environment or {}).items()
+            if os.environ.get(key) != value
+        }
+        while True:
+            runner = await self._acquire_runner(job)
+            if runner is None:
+                message = f"No connected runner satisfies {job.requirements}"
+                logging.error(f"  Job '{job.name}': {message}")
+                return CommandOutput(stdout="", stderr=message, return_code=-1)
+
+            # Unique across executors and runs sharing the runner
+            job_id = uuid.uuid4().hex
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[runner.runner_id][job_id] = future
+            logging.info(f"  Job '{job.name}' sent to runner '{runner.runner_id}'")
+            try:
+                await runner.send(
+                    {
+                        "type": "job",
+                        "job_id": job_id,
+                        "name": job.name,
+                        "command": job.command,
+                        "environment": environment,
+                    }
+                )
+            except asyncio.CancelledError:
+                future.cancel()
+                await self._release_runner(runner)
+                raise
+            except Exception as e:
+                # Whatever the cause, a runner that cannot be sent to is gone
+                logging.error(f"  Job '{job.name}' could not be sent: {str(e)}")
+                future.cancel()
+                await self._drop_runner(runner)
+                logging.warning(f"  Reassigning job '{job.name}'")
+                continue
+
+            try:
+                # Shielded so that the runner's reply is still awaited on timeout
+                result = await asyncio.wait_for(
+                    asyncio.shield(future), timeout=self.job_timeout
+                )
+            except RunnerDisconnected:
+                await self._release_runner(runner)
+                logging.warning(f"  Reassigning job '{job.name}'")
+                continue
+            except asyncio.CancelledError:
+                await self._cancel_job(runner, job_id, future)
+                raise
+            except asyncio.TimeoutError:
+                message = f"Job timed out after {self.job_timeout}s"
+                logging.error(f"  Job '{job.name}': {message}")
+                await self._cancel_job(runner, job_id, future)
+                return CommandOutput(stdout="", stderr=message, return_code=-1)
+            await self._release_runner(runner)
+            return CommandOutput(
+                stdout=result["stdout"],
+                stderr=result["stderr"],
+                return_code=result["return_code"],
+            )
+
+    async def _cancel_job(
+        self, runner: RunnerChannel, job_id: str, future: asyncio.Future
+    ):
+        """
+        Asks the runner to stop a job. The job keeps its slot on the runner until
+        the runner replies or disconnects, so the runner is not given more jobs
+        than it has slots.
+        """
+        try:
+            await runner.send({"type": "cancel", "job_id": job_id})
+        except Exception as e:
+            logging.error(f"  Job {job_id} could not be cancelled: {str(e)}")
+            future.cancel()
+            await self._drop_runner(runner)
+            return
+        release = asyncio.create_task(self._release_when_done(runner, future))
+        self._pending_releases.add(release)
+        release.add_done_callback(self._pending_releases.discard)
+
+    async def _release_when_done(self, runner: RunnerChannel, future: asyncio.Future):
+        try:
+            await future
+        except RunnerDisconnected:
+            pass
+        await self._release_runner(runner)
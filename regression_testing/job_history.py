@@ -0,0 +1,131 @@
+import hashlib
+import sqlite3
+import statistics
+import threading
+from typing import Dict, List, Optional
+
+
+class JobHistory:
+    def __init__(self, db_path: str = "job_history.db", window: int = 5):
+        """
+        SQLite store of past job runs, used to predict how long jobs will take.
+
+        Runs are keyed on the job's command, so renamed jobs keep their history.
+
+        :param db_path: Path of the SQLite database file.
+        :param window: Number of most recent runs used for predictions.
+        """
+        self.db_path = db_path
+        self.window = window
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS job_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_key TEXT NOT NULL,
+                job_name TEXT NOT NULL,
+                command TEXT NOT NULL,
+                started_at TEXT NOT NULL,
+                duration REAL NOT NULL,
+                cpu_time REAL,
+                peak_rss INTEGER,
+                success INTEGER NOT NULL
+            )
+            """)
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_job_runs_key ON job_runs (job_key, id)"
+        )
+        self._connection.commit()
+        self._expected: Dict[str, Optional[float]] = {}
+
+    @staticmethod
+    def job_key(command: str) -> str:
+        """
+        Returns the key under which the runs of a command are stored.
+        """
+        return hashlib.sha1(command.encode()).hexdigest()
+
+    def record(
+        self,
+        job_name: str,
+        command: str,
+        started_at: str,
+        duration: float,
+        cpu_time: Optional[float] = None,
+        peak_rss: Optional[int] = None,
+        success: bool = True,
+    ):
+        """
+        Stores one run of a job.
+
+        :param job_name: The name of the job.
+        :param command: The job's command.
+        :param started_at: Timestamp of when the job was started.
+        :param duration: Wall-clock time in seconds.
+        :param cpu_time: User plus system CPU time in seconds, if known.
+        :param peak_rss: Peak resident set size in bytes, if known.
+        :param success: Whether the job succeeded.
+        """
+        key = self.job_key(command)
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO job_runs (job_key, job_name, command, started_at,"
+                " duration, cpu_time, peak_rss, success)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    job_name,
+                    command,
+                    started_at,
+                    duration,
+                    cpu_time,
+                    peak_rss,
+                    int(success),
+                ),
+            )
+            self._connection.commit()
+            self._expected.pop(key, None)
+
+    def expected_duration(self, command: str) -> Optional[float]:
+        """
+        Predicts the wall-clock time of a job from its recent runs.
+
+        :param command: The job's command.
+        :return: Median duration of the last ``window`` runs, or None without history.
+        """
+        key = self.job_key(command)
+        with self._lock:
+            if key not in self._expected:
+                rows = self._connection.execute(
+                    "SELECT duration FROM job_runs WHERE job_key = ?"
+                    " ORDER BY id DESC LIMIT ?",
+                    (key, self.window),
+                ).fetchall()
+                self._expected[key] = (
+                    statistics.median(row[0] for row in rows) if rows else None
+                )
+            return self._expected[key]
+
+    def runs(self, command: str, limit: int = 20) -> List[Dict]:
+        """
+        Returns the most recent runs of a job, newest first.
+
+        :param command: The job's command.
+        :param limit: Maximum number of runs to return.
+        :return: List of dictionaries, one per run.
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                "SELECT job_name, started_at, duration, cpu_time, peak_rss, success"
+                " FROM job_runs WHERE job_key = ? ORDER BY id DESC LIMIT ?",
+                (self.job_key(command), limit),
+            )
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def close(self):
+        """
+        Closes the database connection.
+        """
+        with self._lock:
+            self._connection.close()
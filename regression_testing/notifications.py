@@ -0,0 +1,236 @@
+import atexit
+import logging
+import queue
+import smtplib
+import threading
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import List, Optional, Set, Union
+
+# Queue markers: send the pending digest now / stop the dispatcher
+_FLUSH = object()
+_STOP = object()
+
+# Dispatchers stopped while still sending; waited for on exit
+_closing_threads: Set[threading.Thread] = set()
+
+
+class Failure:
+    def __init__(self, job_name: str, command: str, stdout: str, stderr: str):
+        """
+        A failed job waiting to be reported.
+
+        :param job_name: The name of the job.
+        :param command: The job's command.
+        :param stdout: The standard output of the job.
+        :param stderr: The standard error of the job.
+        """
+        self.job_name = job_name
+        self.command = command
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+class FailureNotifier:
+    def __init__(
+        self,
+        smtp_host: str = "smtp.example.com",
+        smtp_port: int = 587,
+        sender_email: str = "your_email@example.com",
+        recipient_email: str = "recipient_email@example.com",
+        password: Optional[str] = "your_password",
+        use_tls: bool = True,
+        digest_window: float = 30.0,
+        max_retries: int = 3,
+        retry_backoff: float = 2.0,
+    ):
+        """
+        Sends job failure emails from a background thread, grouped into digests.
+
+        Failures are queued by ``notify`` without blocking. The dispatcher sends one
+        digest per ``digest_window`` seconds (or earlier, on ``flush``), keeps its
+        SMTP connection open between digests and retries failed sends with
+        exponential backoff.
+
+        For local testing, point it at a debugging SMTP server, e.g.
+        ``python -m aiosmtpd -n -l localhost:1025`` with ``smtp_port=1025``,
+        ``use_tls=False`` and ``password=None``.
+
+        :param smtp_host: SMTP server host.
+        :param smtp_port: SMTP server port.
+        :param sender_email: Sender address, also used as the login user.
+        :param recipient_email: Recipient address.
+        :param password: SMTP password; None to skip logging in.
+        :param use_tls: Whether to upgrade the connection with STARTTLS.
+        :param digest_window: Seconds to collect failures before sending a digest.
+        :param max_retries: Number of retries for a digest that fails to send.
+        :param retry_backoff: Initial seconds between retries; doubles each time.
+        """
+        self.smtp_host = smtp_host
+        self.smtp_port = smtp_port
+        self.sender_email = sender_email
+        self.recipient_email = recipient_email
+        self.password = password
+        self.use_tls = use_tls
+        self.digest_window = digest_window
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._queue: "queue.Queue[Union[Failure, object]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[smtplib.SMTP] = None
+
+    def notify(self, job_name: str, command: str, stdout: str, stderr: str):
+        """
+        Queues a failed job for the next digest. Never blocks on the network.
+
+        :param job_name: The name of the job.
+        :param command: The job's command.
+        :param stdout: The standard output of the job.
+        :param stderr: The standard error of the job.
+        """
+        self._ensure_started()
+        self._queue.put(Failure(job_name, command, stdout, stderr))
+
+    def flush(self):
+        """
+        Asks the dispatcher to send the pending failures now instead of waiting for
+        the end of the digest window.
+        """
+        if self._thread is not None:
+            self._queue.put(_FLUSH)
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Sends the pending failures, then stops the dispatcher and closes the
+        SMTP connection. A dispatcher still sending after ``timeout`` finishes in
+        the background; the process waits for it on exit.
+
+        :param timeout: Optional number of seconds to wait for the dispatcher;
+            0 to return at once.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        atexit.unregister(self.close)
+        _closing_threads.add(thread)
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="failure-notifier", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            if first is _FLUSH:
+                continue
+            batch: List[Failure] = [first]
+            deadline = time.monotonic() + self.digest_window
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    failure = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if failure is _FLUSH:
+                    break
+                if failure is _STOP:
+                    stopping = True
+                    break
+                batch.append(failure)
+            self._send_with_retries(batch)
+        self._disconnect()
+        _closing_threads.discard(threading.current_thread())
+
+    def _send_with_retries(self, batch: List[Failure]):
+        message = self._build_digest(batch)
+        names = ", ".join(failure.job_name for failure in batch)
+        delay = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._connection().sendmail(
+                    self.sender_email, self.recipient_email, message.as_string()
+                )
+                logging.info(f"Failure notification sent for jobs: {names}")
+                return
+            except Exception as e:
+                self._disconnect()
+                if attempt == self.max_retries:
+                    logging.error(f"Failed to send notification for jobs {names}: {e}")
+                    return
+                logging.warning(
+                    f"Sending failure notification failed ({e}), retrying in {delay}s"
+                )
+                time.sleep(delay)
+                delay *= 2
+
+    def _connection(self) -> smtplib.SMTP:
+        if self._server is not None:
+            try:
+                if self._server.noop()[0] == 250:
+                    return self._server
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._disconnect()
+        server = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=30)
+        if self.use_tls:
+            server.starttls()
+        if self.password is not None:
+            server.login(self.sender_email, self.password)
+        self._server = server
+        return server
+
+    def _disconnect(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except Exception:
+            pass
+        self._server = None
+
+    def _build_digest(self, batch: List[Failure]) -> MIMEMultipart:
+        if len(batch) == 1:
+            subject = f"Job Failure Notification: {batch[0].job_name}"
+        else:
+            subject = f"Job Failure Notification: {len(batch)} jobs failed"
+        sections = []
+        for failure in batch:
+            sections.append(f"""
+        The job '{failure.job_name}' has failed.
+
+        Command: {failure.command}
+
+        Standard Output:
+        {failure.stdout}
+
+        Standard Error:
+        {failure.stderr}
+        """)
+
+        msg = MIMEMultipart()
+        msg["From"] = self.sender_email
+        msg["To"] = self.recipient_email
+        msg["Subject"] = subject
+        msg.attach(MIMEText("\n".join(sections), "plain"))
+        return msg
+
+
+@atexit.register
+def _wait_for_closing_dispatchers():
+    for thread in list(_closing_threads):
+        thread.join()
@@ -0,0 +1,201 @@
+import os
+import selectors
+import subprocess
+import tempfile
+import threading
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
+
+CHUNK_SIZE = 64 * 1024
+MAX_LINE_LENGTH = 64 * 1024
+
+
+class OutputBuffer:
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        spill_threshold: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        spill_suffix: str = ".log",
+    ):
+        """
+        Collects the output of one stream as a list of byte chunks.
+
+        Once more than ``spill_threshold`` bytes have been written, the output is
+        streamed to a file in ``spill_dir`` and only the most recent
+        ``spill_threshold`` bytes are kept in memory.
+
+        :param max_bytes: Optional cap on the bytes kept; the rest is dropped.
+        :param spill_threshold: Optional in-memory byte count before spilling to disk.
+        :param spill_dir: Directory for spill files. Defaults to the system temp dir.
+        :param spill_suffix: Suffix of the spill file name.
+        """
+        self.max_bytes = max_bytes
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        self.spill_suffix = spill_suffix
+        self.spill_path: Optional[str] = None
+        self.total_bytes: int = 0
+        self.truncated: bool = False
+        self._chunks: Deque[bytes] = deque()
+        self._buffered_bytes: int = 0
+        self._spill_file = None
+
+    def write(self, data: bytes):
+        """
+        Appends a chunk of output.
+
+        :param data: The bytes read from the stream.
+        """
+        if self.max_bytes is not None:
+            room = self.max_bytes - self.total_bytes
+            if len(data) > room:
+                data = data[: max(room, 0)]
+                self.truncated = True
+        if not data:
+            return
+        self.total_bytes += len(data)
+
+        if self._spill_file is None and self._should_spill(len(data)):
+            self._start_spill()
+        if self._spill_file is not None:
+            self._spill_file.write(data)
+
+        self._chunks.append(data)
+        self._buffered_bytes += len(data)
+        if self._spill_file is not None:
+            # Only keep the tail in memory once everything is on disk
+            while (
+                len(self._chunks) > 1
+                and self._buffered_bytes - len(self._chunks[0]) >= self.spill_threshold
+            ):
+                self._buffered_bytes -= len(self._chunks.popleft())
+
+    def _should_spill(self, incoming: int) -> bool:
+        return (
+            self.spill_threshold is not None
+            and self._buffered_bytes + incoming > self.spill_threshold
+        )
+
+    def _start_spill(self):
+        self._spill_file = tempfile.NamedTemporaryFile(
+            mode="wb",
+            dir=self.spill_dir,
+            prefix="job-output-",
+            suffix=self.spill_suffix,
+            delete=False,
+        )
+        self.spill_path = self._spill_file.name
+        for chunk in self._chunks:
+            self._spill_file.write(chunk)
+
+    def close(self):
+        """
+        Closes the spill file, if any.
+        """
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def getvalue(self) -> str:
+        """
+        Returns the in-memory output (the tail of it if the output was spilled).
+
+        :return: The decoded output.
+        """
+        return b"".join(self._chunks).decode("utf-8", errors="replace")
+
+
+class LineSplitter:
+    def __init__(self, on_line: Optional[Callable[[str], None]]):
+        """
+        Splits a stream of byte chunks into lines and passes each one to ``on_line``.
+
+        :param on_line: Callback receiving each decoded, stripped line.
+        """
+        self.on_line = on_line
+        self._partial: bytes = b""
+
+    def feed(self, data: bytes):
+        """
+        Processes a chunk of output.
+
+        :param data: The bytes read from the stream.
+        """
+        if self.on_line is None:
+            return
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        if len(self._partial) > MAX_LINE_LENGTH:
+            lines.append(self._partial)
+            self._partial = b""
+        for line in lines:
+            self.on_line(line.decode("utf-8", errors="replace").strip())
+
+    def flush(self):
+        """
+        Emits any trailing text that did not end with a newline.
+        """
+        if self.on_line is not None and self._partial:
+            self.on_line(self._partial.decode("utf-8", errors="replace").strip())
+        self._partial = b""
+
+
+def drain_streams(
+    process: subprocess.Popen,
+    stdout_buffer: OutputBuffer,
+    stderr_buffer: OutputBuffer,
+    on_stdout_line: Optional[Callable[[str], None]] = None,
+    on_stderr_line: Optional[Callable[[str], None]] = None,
+):
+    """
+    Reads stdout and stderr of a binary-mode process at the same time until both end.
+
+    Uses a selector on POSIX and one reader thread per stream on Windows, where
+    pipes cannot be selected on. Neither pipe can fill up while the other is read.
+
+    :param process: Process started with ``stdout=PIPE`` and ``stderr=PIPE``.
+    :param stdout_buffer: Buffer receiving the standard output.
+    :param stderr_buffer: Buffer receiving the standard error.
+    :param on_stdout_line: Optional callback for each line of standard output.
+    :param on_stderr_line: Optional callback for each line of standard error.
+    """
+    streams: List[Tuple[object, OutputBuffer, LineSplitter]] = [
+        (process.stdout, stdout_buffer, LineSplitter(on_stdout_line)),
+        (process.stderr, stderr_buffer, LineSplitter(on_stderr_line)),
+    ]
+    if os.name == "nt":
+        _drain_with_threads(streams)
+    else:
+        _drain_with_selector(streams)
+    for stream, buffer, splitter in streams:
+        splitter.flush()
+        stream.close()
+
+
+def _drain_with_selector(streams):
+    with selectors.DefaultSelector() as selector:
+        for stream, buffer, splitter in streams:
+            selector.register(stream, selectors.EVENT_READ, (buffer, splitter))
+        while selector.get_map():
+            for key, _ in selector.select():
+                data = os.read(key.fd, CHUNK_SIZE)
+                if not data:
+                    selector.unregister(key.fileobj)
+                    continue
+                buffer, splitter = key.data
+                buffer.write(data)
+                splitter.feed(data)
+
+
+def _drain_with_threads(streams):
+    def pump(stream, buffer: OutputBuffer, splitter: LineSplitter):
+        for data in iter(lambda: stream.read1(CHUNK_SIZE), b""):
+            buffer.write(data)
+            splitter.feed(data)
+
+    threads = [threading.Thread(target=pump, args=entry) for entry in streams]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
@@ -0,0 +1,1151 @@
+import subprocess
+from typing import Callable, Deque, Iterator, List, Set, Tuple, Optional, Dict
+import os
+import shutil
+import sys
+import tempfile
+import time
+import heapq
+from collections import Counter, deque
+import threading
+import weakref
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import contextmanager
+import logging
+from datetime import datetime
+
+from output_capture import OutputBuffer, drain_streams
+from job_history import JobHistory
+from notifications import FailureNotifier
+from result_cache import ResultCache
+from result_export import (
+    DEFAULT_PREVIEW_CHARS,
+    iter_result_records,
+    write_arrow,
+    write_jsonl,
+)
+
+# Expected duration (seconds) of jobs without any recorded history
+DEFAULT_JOB_DURATION = 1.0
+
+
+class PipelineValidationError(ValueError):
+    """
+    Raised when a pipeline's stage dependencies cannot be scheduled.
+    """
+
+
+class JobResult:
+    def __init__(
+        self,
+        job: "Job",
+        stdout: str,
+        stderr: str,
+        success: bool,
+        execution_time: str,
+        stdout_path: Optional[str] = None,
+        stderr_path: Optional[str] = None,
+        truncated: bool = False,
+        cached: bool = False,
+        stage_name: Optional[str] = None,
+        duration: Optional[float] = None,
+        cpu_time: Optional[float] = None,
+        peak_rss: Optional[int] = None,
+    ):
+        """
+        Represents the result of a job execution.
+
+        :param job: The job that was executed.
+        :param stdout: The standard output of the job (its tail if it was spilled).
+        :param stderr: The standard error of the job (its tail if it was spilled).
+        :param success: Boolean indicating whether the job was successful.
+        :param execution_time: Timestamp of when the job was executed.
+        :param stdout_path: File holding the full standard output, if it was spilled.
+        :param stderr_path: File holding the full standard error, if it was spilled.
+        :param truncated: Whether output beyond the job's output cap was dropped.
+        :param cached: Whether the result was reused from the result cache.
+        :param stage_name: The name of the stage the job belongs to.
+        :param duration: Wall-clock time of the job in seconds.
+        :param cpu_time: User plus system CPU time of the job in seconds, if known.
+        :param peak_rss: Peak resident set size of the job in bytes, if known.
+        """
+        self.job = job
+        self.stdout = stdout
+        self.stderr = stderr
+        self.success = success
+        self.execution_time = execution_time
+        self.stdout_path = stdout_path
+        self.stderr_path = stderr_path
+        self.truncated = truncated
+        self.cached = cached
+        self.stage_name = stage_name
+        self.duration = duration
+        self.cpu_time = cpu_time
+        self.peak_rss = peak_rss
+
+    def remove_spill_files(self):
+        """
+        Deletes the files holding the full output of the job, if it was spilled.
+        The tail kept in ``stdout`` and ``stderr`` remains.
+        """
+        for path in (self.stdout_path, self.stderr_path):
+            if path is not None:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        self.stdout_path = None
+        self.stderr_path = None
+
+
+class Job:
+    def __init__(
+        self,
+        name: str,
+        command: str,
+        environment: Optional[Dict[str, str]] = None,
+        max_output_bytes: Optional[int] = None,
+        input_files: Optional[List[str]] = None,
+        cache_env_keys: Optional[List[str]] = None,
+        requirements: Optional[Dict[str, object]] = None,
+    ):
+        """
+        Represents a job that executes a specific command.
+
+        :param name: The name of the job.
+        :param command: The command to be executed.
+        :param environment: Optional dictionary of environment variables for the job.
+        :param max_output_bytes: Optional cap on the bytes kept per output stream,
+            overriding the executor's default.
+        :param input_files: Files or directories the job's outcome depends on; their
+            content is part of the job's result-cache fingerprint.
+        :param cache_env_keys: Environment variables that are part of the job's
+            result-cache fingerprint.
+        :param requirements: Optional runner capabilities the job needs when it is
+            executed on remote runners, e.g. ``{"software": ["Python"]}``.
+        """
+        self.name: str = name
+        self.command: str = command
+        self.environment: Optional[Dict[str, str]] = environment or dict(os.environ)
+        self.max_output_bytes: Optional[int] = max_output_bytes
+        self.input_files: List[str] = input_files or []
+        self.cache_env_keys: List[str] = cache_env_keys or []
+        self.requirements: Dict[str, object] = requirements or {}
+        self.result: Optional[JobResult] = None  # Holds the result of the job execution
+
+
+class EnvironmentSetupJob(Job):
+    def __init__(self, name: str, setup_script: str, args: Optional[List[str]] = None):
+        """
+        Special job for setting up the environment with optional arguments.
+
+        :param name: The name of the job.
+        :param setup_script: The script that sets up the environment.
+        :param args: A list of arguments to pass to the setup script.
+        """
+        command = setup_script
+        if args:
+            command += " " + " ".join(args)
+        super().__init__(name, command)
+
+
+class Stage:
+    def __init__(
+        self,
+        name: str,
+        parallel: bool = False,
+        max_parallel: Optional[int] = None,
+        weight: int = 1,
+    ):
+        """
+        Represents a stage in the pipeline, which contains multiple jobs.
+
+        :param name: The name of the stage.
+        :param parallel: Whether the jobs in this stage should be executed in parallel.
+        :param max_parallel: Maximum number of jobs of this stage running at once.
+            Defaults to no per-stage limit (the executor's global limit still applies).
+        :param weight: Number of global job slots each job of this stage occupies.
+        """
+        self.name: str = name
+        self.jobs: List[Job] = []
+        self.parallel: bool = parallel
+        self.max_parallel: Optional[int] = max_parallel
+        self.weight: int = weight
+        self.results: List[JobResult] = []  # Stores results of jobs within the stage
+
+    def add_job(self, job: Job):
+        """
+        Adds a job to the stage.
+
+        :param job: The job to add.
+        """
+        self.jobs.append(job)
+
+
+class WeightedSemaphore:
+    def __init__(self, capacity: int):
+        """
+        Semaphore whose holders may take several slots at once.
+
+        Waiters are served in arrival order, so heavy jobs are not starved by a
+        stream of light ones and jobs start in the order they were dispatched.
+
+        :param capacity: Total number of slots.
+        """
+        self.capacity: int = capacity
+        self._available: int = capacity
+        self._condition = threading.Condition()
+        self._waiters: Deque[object] = deque()
+
+    def acquire(self, weight: int = 1) -> int:
+        """
+        Blocks until ``weight`` slots are free and takes them.
+
+        :param weight: Number of slots to take, capped at the capacity.
+        :return: The number of slots actually taken.
+        """
+        weight = max(1, min(weight, self.capacity))
+        ticket = object()
+        with self._condition:
+            self._waiters.append(ticket)
+            self._condition.wait_for(
+                lambda: self._waiters[0] is ticket and self._available >= weight
+            )
+            self._waiters.popleft()
+            self._available -= weight
+            self._condition.notify_all()
+        return weight
+
+    def release(self, weight: int = 1):
+        """
+        Returns slots taken by ``acquire``.
+
+        :param weight: Number of slots to return.
+        """
+        with self._condition:
+            self._available += weight
+            self._condition.notify_all()
+
+    @contextmanager
+    def slots(self, weight: int = 1):
+        """
+        Holds ``weight`` slots for the duration of a ``with`` block.
+        """
+        taken = self.acquire(weight)
+        try:
+            yield taken
+        finally:
+            self.release(taken)
+
+
+class CommandOutput:
+    def __init__(
+        self,
+        stdout: str,
+        stderr: str,
+        return_code: int,
+        stdout_path: Optional[str] = None,
+        stderr_path: Optional[str] = None,
+        truncated: bool = False,
+        cached: bool = False,
+        duration: Optional[float] = None,
+        cpu_time: Optional[float] = None,
+        peak_rss: Optional[int] = None,
+    ):
+        """
+        Captured output of a finished command.
+
+        :param stdout: The standard output (its tail if it was spilled).
+        :param stderr: The standard error (its tail if it was spilled).
+        :param return_code: The exit code of the command.
+        :param stdout_path: File holding the full standard output, if it was spilled.
+        :param stderr_path: File holding the full standard error, if it was spilled.
+        :param truncated: Whether output beyond the output cap was dropped.
+        :param cached: Whether the output was taken from the result cache.
+        :param duration: Wall-clock time of the command in seconds.
+        :param cpu_time: User plus system CPU time of the command in seconds.
+        :param peak_rss: Peak resident set size of the command in bytes.
+        """
+        self.stdout = stdout
+        self.stderr = stderr
+        self.return_code = return_code
+        self.stdout_path = stdout_path
+        self.stderr_path = stderr_path
+        self.truncated = truncated
+        self.cached = cached
+        self.duration = duration
+        self.cpu_time = cpu_time
+        self.peak_rss = peak_rss
+
+    @classmethod
+    def from_buffers(
+        cls, stdout: OutputBuffer, stderr: OutputBuffer, return_code: int, **kwargs
+    ) -> "CommandOutput":
+        """
+        Builds the output of a command from its stream buffers.
+
+        :param stdout: Buffer holding the standard output.
+        :param stderr: Buffer holding the standard error.
+        :param return_code: The exit code of the command.
+        :param kwargs: Resource usage of the command (duration, cpu_time, peak_rss).
+        :return: The captured output.
+        """
+        return cls(
+            stdout=stdout.getvalue(),
+            stderr=stderr.getvalue(),
+            return_code=return_code,
+            stdout_path=stdout.spill_path,
+            stderr_path=stderr.spill_path,
+            truncated=stdout.truncated or stderr.truncated,
+            **kwargs,
+        )
+
+
+def run_command(
+    command: str,
+    environment: Optional[Dict[str, str]],
+    max_output_bytes: Optional[int] = None,
+    spill_threshold: Optional[int] = None,
+    spill_dir: Optional[str] = None,
+) -> CommandOutput:
+    """
+    Runs a shell command, logging its output in real time.
+
+    Standard output and standard error are drained concurrently, so a command
+    writing heavily to one stream cannot block on a full pipe. Kept at module
+    level so it can be submitted to a process pool.
+
+    :param command: The command to run.
+    :param environment: Environment variables for the command.
+    :param max_output_bytes: Optional cap on the bytes kept per stream.
+    :param spill_threshold: Optional in-memory byte count per stream above which
+        the output is written to a file instead.
+    :param spill_dir: Directory for spilled output files.
+    :return: The captured output, return code and resource usage.
+    """
+    started = time.monotonic()
+    process = subprocess.Popen(
+        command,
+        shell=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=environment if environment else os.environ.copy(),
+    )
+    stdout = OutputBuffer(max_output_bytes, spill_threshold, spill_dir, ".stdout.log")
+    stderr = OutputBuffer(max_output_bytes, spill_threshold, spill_dir, ".stderr.log")
+    try:
+        # Log output in real-time
+        drain_streams(
+            process,
+            stdout,
+            stderr,
+            on_stdout_line=lambda line: logging.info(f"  [STDOUT] {line}"),
+            on_stderr_line=lambda line: logging.error(f"  [STDERR] {line}"),
+        )
+        return_code, usage = wait_with_usage(process)
+    finally:
+        stdout.close()
+        stderr.close()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+    return CommandOutput.from_buffers(
+        stdout, stderr, return_code, duration=time.monotonic() - started, **usage
+    )
+
+
+def wait_with_usage(process: subprocess.Popen) -> Tuple[int, Dict[str, object]]:
+    """
+    Waits for a process and collects its CPU time and peak memory.
+
+    Resource usage is only available on POSIX, where the process is reaped with
+    ``os.wait4``; elsewhere only the return code is returned.
+
+    :param process: The process to wait for.
+    :return: Tuple of (return code, dict with 'cpu_time' and 'peak_rss' if known).
+    """
+    if not hasattr(os, "wait4"):
+        return process.wait(), {}
+    _, status, rusage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss_unit = 1 if sys.platform == "darwin" else 1024
+    return process.returncode, {
+        "cpu_time": rusage.ru_utime + rusage.ru_stime,
+        "peak_rss": rusage.ru_maxrss * rss_unit,
+    }
+
+
+class Pipeline:
+    def __init__(self):
+        """
+        Represents a pipeline consisting of multiple stages.
+        """
+        self.stages: List[Stage] = []
+        self.stage_dependencies: Dict[str, List[str]] = (
+            {}
+        )  # Maps stage names to their dependencies
+
+    def add_stage(self, stage: Stage, dependencies: Optional[List[str]] = None):
+        """
+        Adds a stage to the pipeline.
+
+        :param stage: The stage to add.
+        :param dependencies: List of stage names that must complete before this stage can run.
+        """
+        self.stages.append(stage)
+        if dependencies:
+            self.stage_dependencies[stage.name] = dependencies
+        else:
+            self.stage_dependencies[stage.name] = []
+
+    def get_stage(self, name: str) -> Stage:
+        """
+        Returns the stage with the given name.
+
+        :param name: The name of the stage.
+        :return: The matching stage.
+        """
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise KeyError(name)
+
+    def stages_by_name(self) -> Dict[str, Stage]:
+        """
+        Maps stage names to stages, for repeated lookups.
+
+        :return: Dictionary of stage name to stage (the first one, if duplicated).
+        """
+        stages: Dict[str, Stage] = {}
+        for stage in self.stages:
+            stages.setdefault(stage.name, stage)
+        return stages
+
+    def validate(self):
+        """
+        Checks that all dependencies refer to known stages and contain no cycles.
+
+        :raises PipelineValidationError: If a dependency is unknown, a stage name is
+            duplicated, or the dependencies form a cycle.
+        """
+        names = [stage.name for stage in self.stages]
+        duplicates = sorted(name for name, count in Counter(names).items() if count > 1)
+        if duplicates:
+            raise PipelineValidationError(f"Duplicate stage names: {duplicates}")
+
+        known = set(names)
+        unknown = {
+            stage_name: [dep for dep in deps if dep not in known]
+            for stage_name, deps in self.stage_dependencies.items()
+        }
+        unknown = {stage_name: deps for stage_name, deps in unknown.items() if deps}
+        if unknown:
+            raise PipelineValidationError(f"Unknown stage dependencies: {unknown}")
+
+        ordered = self.topological_order()
+        if len(ordered) < len(self.stages):
+            scheduled = set(ordered)
+            blocked = [name for name in names if name not in scheduled]
+            raise PipelineValidationError(
+                f"Cyclic stage dependencies between: {blocked}"
+            )
+
+    def dependents(self) -> Dict[str, List[str]]:
+        """
+        Returns the reverse dependency map: stage name -> stages that depend on it.
+
+        :return: Dictionary mapping every stage name to its direct dependents.
+        """
+        dependents: Dict[str, List[str]] = {stage.name: [] for stage in self.stages}
+        for stage in self.stages:
+            for dep in self.stage_dependencies.get(stage.name, []):
+                dependents.setdefault(dep, []).append(stage.name)
+        return dependents
+
+    def topological_order(self) -> List[str]:
+        """
+        Orders stage names so that every stage comes after its dependencies.
+
+        Stages that are part of a cycle are left out of the result.
+
+        :return: List of stage names in dependency order.
+        """
+        remaining = {
+            stage.name: len(self.stage_dependencies.get(stage.name, []))
+            for stage in self.stages
+        }
+        dependents = self.dependents()
+        ready = deque(name for name, count in remaining.items() if count == 0)
+        ordered: List[str] = []
+        while ready:
+            name = ready.popleft()
+            ordered.append(name)
+            for dependent in dependents.get(name, []):
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        return ordered
+
+    def critical_path(
+        self, estimate: Optional[Callable[[Stage], float]] = None
+    ) -> Tuple[List[str], float]:
+        """
+        Estimates the longest chain of dependent stages.
+
+        :param estimate: Optional function returning the expected cost of a stage.
+            Defaults to the job count for sequential stages and 1 for parallel ones.
+        :return: Tuple of (stage names along the critical path, total estimated cost).
+        """
+        self.validate()
+        remaining_cost = self.remaining_costs(estimate)
+        if not remaining_cost:
+            return [], 0.0
+
+        dependents = self.dependents()
+        roots = [
+            stage.name
+            for stage in self.stages
+            if not self.stage_dependencies.get(stage.name)
+        ]
+        path = [max(roots, key=lambda name: remaining_cost[name])]
+        while dependents[path[-1]]:
+            path.append(
+                max(dependents[path[-1]], key=lambda name: remaining_cost[name])
+            )
+        return path, remaining_cost[path[0]]
+
+    def remaining_costs(
+        self, estimate: Optional[Callable[[Stage], float]] = None
+    ) -> Dict[str, float]:
+        """
+        Computes, per stage, the estimated cost of the longest chain starting at it.
+
+        :param estimate: Optional function returning the expected cost of a stage.
+        :return: Dictionary mapping stage names to their remaining critical-path cost.
+        """
+        estimate = estimate or default_stage_estimate
+        dependents = self.dependents()
+        stages = self.stages_by_name()
+        remaining_cost: Dict[str, float] = {}
+        for name in reversed(self.topological_order()):
+            downstream = [remaining_cost[dep] for dep in dependents.get(name, [])]
+            remaining_cost[name] = estimate(stages[name]) + max(downstream, default=0.0)
+        return remaining_cost
+
+
+def default_stage_estimate(stage: Stage) -> float:
+    """
+    Rough cost of a stage when no timing history is available.
+
+    :param stage: The stage to estimate.
+    :return: Number of jobs for sequential stages, 1 for non-empty parallel stages.
+    """
+    if not stage.jobs:
+        return 0.0
+    return 1.0 if stage.parallel else float(len(stage.jobs))
+
+
+class StageScheduler:
+    def __init__(
+        self, pipeline: Pipeline, estimate: Optional[Callable[[Stage], float]] = None
+    ):
+        """
+        Tracks which stages of a pipeline are ready to run.
+
+        Stages become ready once all of their dependencies have completed. Ready
+        stages on the longest remaining chain of dependencies are handed out first.
+
+        :param pipeline: The pipeline to schedule.
+        :param estimate: Optional function returning the expected cost of a stage.
+        :raises PipelineValidationError: If dependencies are unknown or cyclic.
+        """
+        pipeline.validate()
+        self.pipeline = pipeline
+        self.stages: Dict[str, Stage] = pipeline.stages_by_name()
+        self.priority: Dict[str, float] = pipeline.remaining_costs(estimate)
+        self.order: Dict[str, int] = {
+            stage.name: index for index, stage in enumerate(pipeline.stages)
+        }
+        self.dependents: Dict[str, List[str]] = pipeline.dependents()
+        self.pending_dependencies: Dict[str, int] = {
+            stage.name: len(pipeline.stage_dependencies.get(stage.name, []))
+            for stage in pipeline.stages
+        }
+        self._ready: List[Tuple[float, int, str]] = []
+        for name, count in self.pending_dependencies.items():
+            if count == 0:
+                self._mark_ready(name)
+
+    def _mark_ready(self, name: str):
+        heapq.heappush(self._ready, (-self.priority[name], self.order[name], name))
+
+    def has_ready(self) -> bool:
+        """
+        :return: Whether a stage is waiting to be dispatched.
+        """
+        return bool(self._ready)
+
+    def pop_ready(self) -> Stage:
+        """
+        Takes the highest-priority ready stage off the queue.
+
+        :return: The stage to run next.
+        """
+        _, _, name = heapq.heappop(self._ready)
+        return self.stages[name]
+
+    def complete(self, stage: Stage):
+        """
+        Marks a stage as finished, readying dependents whose dependencies are all done.
+
+        :param stage: The stage that finished.
+        """
+        for dependent in self.dependents.get(stage.name, []):
+            self.pending_dependencies[dependent] -= 1
+            if self.pending_dependencies[dependent] == 0:
+                self._mark_ready(dependent)
+
+
+class PipelineExecutor:
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        max_workers: Optional[int] = None,
+        max_parallel_jobs: Optional[int] = None,
+        executor_type: str = "thread",
+        max_output_bytes: Optional[int] = None,
+        spill_threshold: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+        result_cache: Optional[ResultCache] = None,
+        history: Optional[JobHistory] = None,
+        notifier: Optional[FailureNotifier] = None,
+    ):
+        """
+        Initializes the PipelineExecutor, which manages the execution of a given pipeline.
+
+        :param pipeline: The pipeline to be executed.
+        :param max_workers: Maximum number of stages running at the same time.
+            Defaults to the number of CPUs.
+        :param max_parallel_jobs: Global number of job slots shared by all running
+            stages. Each job takes ``stage.weight`` slots. Defaults to the CPU count.
+        :param executor_type: 'thread' to run job commands from worker threads, or
+            'process' to run them in a pool of worker processes.
+        :param max_output_bytes: Default cap on the bytes kept per job output stream.
+        :param spill_threshold: Optional in-memory byte count per job output stream
+            above which the full output is written to a file in ``spill_dir``.
+        :param spill_dir: Directory for spilled job output. Defaults to a temporary
+            directory of the executor, deleted with it or on exit.
+        :param result_cache: Optional cache of successful job results. Jobs whose
+            fingerprint is found in it are not run again.
+        :param history: Optional store of past job durations. Every run is recorded
+            in it, and parallel work is ordered longest-expected-first.
+        :param notifier: Background dispatcher for failure emails, which may be
+            shared by several executors. Defaults to a ``FailureNotifier`` with its
+            default SMTP settings, closed at the end of each run.
+        """
+        if executor_type not in ("thread", "process"):
+            raise ValueError(
+                f"executor_type must be 'thread' or 'process', got '{executor_type}'"
+            )
+        self.pipeline = pipeline
+        self.max_workers: int = max_workers or os.cpu_count() or 1
+        self.job_slots = WeightedSemaphore(max_parallel_jobs or os.cpu_count() or 1)
+        self.executor_type: str = executor_type
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self.max_output_bytes: Optional[int] = max_output_bytes
+        self.spill_threshold: Optional[int] = spill_threshold
+        if spill_dir is None and spill_threshold is not None:
+            spill_dir = tempfile.mkdtemp(prefix="pipeline-spill-")
+            weakref.finalize(self, shutil.rmtree, spill_dir, True)
+        self.spill_dir: Optional[str] = spill_dir
+        self.result_cache: Optional[ResultCache] = result_cache
+        self.history: Optional[JobHistory] = history
+        self.notifier: FailureNotifier = notifier or FailureNotifier()
+        self._owns_notifier: bool = notifier is None
+        self.results: List[JobResult] = []  # Stores results of all jobs in the pipeline
+
+    def expected_duration(self, job: Job) -> float:
+        """
+        Predicts how long a job will take from its recorded history.
+
+        :param job: The job to estimate.
+        :return: Expected wall-clock seconds, ``DEFAULT_JOB_DURATION`` if unknown.
+        """
+        expected = self.history.expected_duration(job.command) if self.history else None
+        return DEFAULT_JOB_DURATION if expected is None else expected
+
+    def estimate_stage(self, stage: Stage) -> float:
+        """
+        Predicts how long a stage will take from the expected durations of its jobs.
+
+        :param stage: The stage to estimate.
+        :return: Expected wall-clock seconds.
+        """
+        durations = [self.expected_duration(job) for job in stage.jobs]
+        if not durations:
+            return 0.0
+        if not stage.parallel:
+            return sum(durations)
+        workers = min(
+            stage.max_parallel or len(durations),
+            max(1, self.job_slots.capacity // max(1, stage.weight)),
+            len(durations),
+        )
+        return max(max(durations), sum(durations) / workers)
+
+    def order_jobs(self, stage: Stage) -> List[Job]:
+        """
+        Orders the jobs of a parallel stage longest-expected-first, so the longest
+        job starts early and the stage ends close to when it does.
+
+        :param stage: The stage whose jobs to order.
+        :return: The jobs in dispatch order.
+        """
+        if not stage.parallel or self.history is None:
+            return list(stage.jobs)
+        return sorted(stage.jobs, key=self.expected_duration, reverse=True)
+
+    def stage_estimator(self) -> Optional[Callable[[Stage], float]]:
+        """
+        Returns the stage cost estimate to schedule with, history-based if available.
+        """
+        return self.estimate_stage if self.history is not None else None
+
+    def execute_stage(self, stage: Stage):
+        """
+        Executes a single stage, either sequentially or in parallel.
+        """
+        logging.info(f"Executing Stage: {stage.name}")
+        if stage.parallel and stage.jobs:
+            workers = min(
+                stage.max_parallel or len(stage.jobs),
+                max(1, self.job_slots.capacity // max(1, stage.weight)),
+                len(stage.jobs),
+            )
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for future in [
+                    pool.submit(self.execute_job, job, stage)
+                    for job in self.order_jobs(stage)
+                ]:
+                    future.result()
+        else:
+            for job in stage.jobs:
+                self.execute_job(job, stage)
+
+    def execute_job(self, job: Job, stage: Stage):
+        """
+        Executes a single job and stores the result.
+        """
+        logging.info(f"  Executing Job: {job.name}")
+        fingerprint, cached_output = self.cache_lookup(job)
+        if cached_output is not None:
+            start_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.record_result(job, stage, cached_output, start_time)
+            return
+
+        command_args = (
+            job.command,
+            job.environment,
+            job.max_output_bytes or self.max_output_bytes,
+            self.spill_threshold,
+            self.spill_dir,
+        )
+        with self.job_slots.slots(stage.weight):
+            start_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if self._process_pool is not None:
+                output = self._process_pool.submit(run_command, *command_args).result()
+            else:
+                output = run_command(*command_args)
+        self.cache_store(fingerprint, output)
+        self.record_result(job, stage, output, start_time)
+
+    def cache_lookup(self, job: Job) -> Tuple[Optional[str], Optional[CommandOutput]]:
+        """
+        Fingerprints a job and looks up its result in the result cache.
+
+        :param job: The job about to run.
+        :return: Tuple of (fingerprint, cached output). Both are None when no cache is
+            configured; the output is None on a cache miss.
+        """
+        if self.result_cache is None:
+            return None, None
+        fingerprint = self.result_cache.fingerprint(
+            job.command, job.environment, job.cache_env_keys, job.input_files
+        )
+        record = self.result_cache.get(fingerprint)
+        if record is None:
+            return fingerprint, None
+        logging.info(f"  Job '{job.name}' reused cached result {fingerprint[:12]}")
+        return fingerprint, CommandOutput(**record, cached=True)
+
+    def cache_store(self, fingerprint: Optional[str], output: CommandOutput):
+        """
+        Stores the output of a successful job in the result cache.
+
+        :param fingerprint: The job's fingerprint, or None when no cache is configured.
+        :param output: The job's captured output.
+        """
+        if fingerprint is None or output.return_code != 0:
+            return
+        self.result_cache.put(
+            fingerprint,
+            {
+                "stdout": output.stdout,
+                "stderr": output.stderr,
+                "return_code": output.return_code,
+                "truncated": output.truncated,
+            },
+        )
+
+    def record_result(
+        self, job: Job, stage: Stage, output: CommandOutput, start_time: str
+    ) -> JobResult:
+        """
+        Logs the outcome of a finished job and stores its result.
+
+        :param job: The job that finished.
+        :param stage: The stage the job belongs to.
+        :param output: The captured output of the job's command.
+        :param start_time: Timestamp of when the job was started.
+        :return: The stored job result.
+        """
+        success = output.return_code == 0
+        if success:
+            logging.info(f"  Job '{job.name}' completed successfully")
+        else:
+            logging.error(
+                f"  Job '{job.name}' failed with return code {output.return_code}"
+            )
+            self.send_failure_notification(job, output.stdout, output.stderr)
+
+        # Create and store the job result
+        job_result = JobResult(
+            job=job,
+            stdout=output.stdout.strip(),
+            stderr=output.stderr.strip(),
+            success=success,
+            execution_time=start_time,
+            stdout_path=output.stdout_path,
+            stderr_path=output.stderr_path,
+            truncated=output.truncated,
+            cached=output.cached,
+            stage_name=stage.name,
+            duration=output.duration,
+            cpu_time=output.cpu_time,
+            peak_rss=output.peak_rss,
+        )
+        if self.history is not None and not output.cached and output.duration:
+            self.history.record(
+                job.name,
+                job.command,
+                start_time,
+                output.duration,
+                output.cpu_time,
+                output.peak_rss,
+                success,
+            )
+        job.result = job_result
+        stage.results.append(job_result)
+        self.results.append(job_result)
+        return job_result
+
+    def send_failure_notification(self, job: Job, stdout: str, stderr: str):
+        """
+        Queues an email notification for a failed job.
+
+        The notifier sends it from a background thread, grouped with other failures
+        of the run into one digest, so the worker running the job is not blocked.
+
+        :param job: The job that failed.
+        :param stdout: The standard output of the job.
+        :param stderr: The standard error of the job.
+        """
+        self.notifier.notify(job.name, job.command, stdout, stderr)
+
+    def cleanup(self):
+        """
+        Deletes the spill files of the results, e.g. once they have been exported.
+        """
+        for result in self.results:
+            result.remove_spill_files()
+
+    def execute(self):
+        """
+        Executes the stages in the pipeline, respecting dependencies.
+
+        Stages whose dependencies have completed are put on a ready queue and run
+        concurrently, up to ``max_workers`` at a time. Stages on the longest remaining
+        chain of dependencies are dispatched first.
+
+        :raises PipelineValidationError: If dependencies are unknown or cyclic.
+        """
+        scheduler = StageScheduler(self.pipeline, self.stage_estimator())
+        path, cost = self.pipeline.critical_path(self.stage_estimator())
+        logging.info(f"Critical path ({cost:.1f}): {' -> '.join(path)}")
+
+        if self.executor_type == "process":
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.job_slots.capacity
+            )
+
+        running: Dict[Future, Stage] = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                while scheduler.has_ready() or running:
+                    while scheduler.has_ready() and len(running) < self.max_workers:
+                        stage = scheduler.pop_ready()
+                        running[pool.submit(self.execute_stage, stage)] = stage
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage = running.pop(future)
+                        future.result()
+                        scheduler.complete(stage)
+        finally:
+            if self._process_pool is not None:
+                self._process_pool.shutdown()
+                self._process_pool = None
+            self._end_notifications()
+
+    def _end_notifications(self):
+        """
+        Sends the failures of the run in one digest, without waiting for it. The
+        executor's own notifier is also stopped, so that its thread and SMTP
+        connection end once the digest is sent; a notifier passed in is only
+        flushed, as others may still use it.
+        """
+        if self._owns_notifier:
+            self.notifier.close(timeout=0)
+        else:
+            self.notifier.flush()
+
+    def iter_pipeline_results(
+        self, max_output_chars: Optional[int] = None
+    ) -> Iterator[Dict[str, str]]:
+        """
+        Lazily yields the results of the pipeline for frontend UI, one at a time.
+
+        :param max_output_chars: Optional number of characters of each output
+            stream kept per result.
+        :return: Iterator over dictionaries representing job results.
+        """
+        return iter_result_records(self.results, max_output_chars)
+
+    def get_pipeline_results(self) -> List[Dict[str, str]]:
+        """
+        Returns the results of the entire pipeline for frontend UI.
+
+        :return: List of dictionaries representing job results.
+        """
+        return list(self.iter_pipeline_results())
+
+    def export_results(
+        self,
+        path: str,
+        max_output_chars: Optional[int] = DEFAULT_PREVIEW_CHARS,
+        blob_path: Optional[str] = None,
+    ) -> int:
+        """
+        Streams the results of the pipeline to a file. The format follows the
+        extension: ``.parquet``, ``.arrow`` (both need ``pyarrow``) or JSON Lines.
+
+        :param path: Path of the output file.
+        :param max_output_chars: Optional number of characters of each output
+            stream kept inline.
+        :param blob_path: Optional file receiving the full output of the jobs,
+            referenced from the records by offset.
+        :return: Number of records written.
+        """
+        extension = os.path.splitext(path)[1].lower()
+        if extension in (".parquet", ".arrow"):
+            return write_arrow(
+                self.results, path, extension[1:], max_output_chars, blob_path
+            )
+        return write_jsonl(self.results, path, max_output_chars, blob_path)
+
+
+class TestAction:
+    def __init__(
+        self,
+        name: str,
+        script_path: str,
+        script_type: str = "python",
+        args: Optional[List[str]] = None,
+        depends_on: Optional[List[str]] = None,
+    ):
+        """
+        Represents an individual action within a test case.
+
+        :param name: The name of the action.
+        :param script_path: The path to the script to be executed.
+        :param script_type: The type of script ('python', 'bash', or other).
+        :param args: Optional list of arguments to be passed to the script.
+        :param depends_on: Optional list of files or directories the action depends
+            on, besides its own script.
+        """
+        self.name: str = name
+        self.script_path: str = script_path
+        self.script_type: str = script_type
+        self.args: Optional[List[str]] = args
+        self.depends_on: List[str] = depends_on or []
+
+    def dependency_paths(self) -> List[str]:
+        """
+        Returns every path whose change affects this action.
+
+        :return: The action's script followed by its declared dependencies.
+        """
+        return [self.script_path] + self.depends_on
+
+
+class TestCase:
+    def __init__(
+        self,
+        name: str,
+        actions: List[TestAction],
+        dependencies: Optional[List[str]] = None,
+    ):
+        """
+        Represents a test case containing multiple actions.
+
+        :param name: The name of the test case.
+        :param actions: List of actions within the test case.
+        :param dependencies: Optional list of test case names that must run first.
+        """
+        self.name: str = name
+        self.actions: List[TestAction] = actions
+        self.dependencies: List[str] = dependencies or []
+
+
+class TestSuite:
+    def __init__(self, name: str, cases: List[TestCase]):
+        """
+        Represents a test suite containing multiple test cases.
+
+        :param name: The name of the test suite.
+        :param cases: List of test cases within the test suite.
+        """
+        self.name: str = name
+        self.cases: List[TestCase] = cases
+
+    def path_index(self) -> Dict[str, Set[str]]:
+        """
+        Maps every path declared by an action to the test cases that depend on it.
+
+        :return: Dictionary of normalized path -> names of dependent test cases.
+        """
+        index: Dict[str, Set[str]] = {}
+        for test_case in self.cases:
+            for action in test_case.actions:
+                for path in action.dependency_paths():
+                    index.setdefault(os.path.normpath(path), set()).add(test_case.name)
+        return index
+
+    def affected_cases(
+        self,
+        changed_files: Optional[List[str]] = None,
+        previous_results: Optional[List[Dict[str, str]]] = None,
+    ) -> Set[str]:
+        """
+        Finds the test cases that need to run again.
+
+        A case is affected when a changed file is one of its declared paths or lies
+        inside a declared directory, when it failed in the previous run, or when it
+        depends (directly or not) on an affected case.
+
+        :param changed_files: Paths of files that changed since the previous run.
+        :param previous_results: Results of the previous run, as returned by
+            ``PipelineExecutor.get_pipeline_results``.
+        :return: Names of the affected test cases.
+        """
+        index = self.path_index()
+        affected: Set[str] = set()
+        for changed_file in changed_files or []:
+            path = os.path.normpath(changed_file)
+            while True:
+                affected.update(index.get(path, ()))
+                parent = os.path.dirname(path)
+                if parent == path:
+                    break
+                path = parent
+
+        case_names = {test_case.name for test_case in self.cases}
+        for result in previous_results or []:
+            if result["success"] != "Yes" and result.get("stage_name") in case_names:
+                affected.add(result["stage_name"])
+
+        dependents: Dict[str, List[str]] = {}
+        for test_case in self.cases:
+            for dependency in test_case.dependencies:
+                dependents.setdefault(dependency, []).append(test_case.name)
+        pending = list(affected)
+        while pending:
+            for dependent in dependents.get(pending.pop(), []):
+                if dependent not in affected:
+                    affected.add(dependent)
+                    pending.append(dependent)
+        return affected
+
+    def to_pipeline(
+        self,
+        changed_files: Optional[List[str]] = None,
+        previous_results: Optional[List[Dict[str, str]]] = None,
+    ) -> Pipeline:
+        """
+        Converts the TestSuite object into a Pipeline with stages and jobs.
+
+        Without arguments every test case becomes a stage. Given changed files or a
+        previous run's results, only the affected test cases are included (see
+        ``affected_cases``); dependencies on cases that are left out are dropped.
+
+        :param changed_files: Optional paths of files changed since the previous run.
+        :param previous_results: Optional results of the previous run, as returned by
+            ``PipelineExecutor.get_pipeline_results``.
+        :return: A Pipeline object representing the test suite.
+        """
+        pipeline = Pipeline()
+
+        cases = self.cases
+        if changed_files is not None or previous_results is not None:
+            affected = self.affected_cases(changed_files, previous_results)
+            cases = [
+                test_case for test_case in self.cases if test_case.name in affected
+            ]
+        included = {test_case.name for test_case in cases}
+
+        for test_case in cases:
+            stage = Stage(name=test_case.name, parallel=False)
+
+            for action in test_case.actions:
+                if action.script_type == "python":
+                    command = f"python {action.script_path}"
+                elif action.script_type == "bash":
+                    command = f"bash {action.script_path}"
+                else:
+                    command = action.script_path
+
+                if action.args:
+                    command += " " + " ".join(action.args)
+                job = Job(
+                    name=action.name,
+                    command=command,
+                    input_files=[
+                        path
+                        for path in action.dependency_paths()
+                        if os.path.exists(path)
+                    ],
+                )
+                stage.add_job(job)
+
+            pipeline.add_stage(
+                stage, [dep for dep in test_case.dependencies if dep in included]
+            )
+
+        return pipeline
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class ResultCache:
+    def __init__(
+        self,
+        cache_dir: str,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        env_keys: Optional[List[str]] = None,
+    ):
+        """
+        Content-addressed on-disk store of job results.
+
+        A job's fingerprint covers its command, the values of the relevant
+        environment variables and the content hashes of its declared input files.
+        Each entry is one JSON file named after its fingerprint; when the store
+        grows past ``max_entries`` or ``max_bytes``, the least recently used
+        entries are evicted.
+
+        :param cache_dir: Directory holding the cache entries.
+        :param max_entries: Optional maximum number of entries.
+        :param max_bytes: Optional maximum total size of the entries in bytes.
+        :param env_keys: Environment variables included in every fingerprint, on
+            top of the ones a job declares itself.
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.env_keys: List[str] = env_keys or []
+        self._lock = threading.Lock()
+        self._file_hashes: Dict[Tuple[str, int, int], str] = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        # fingerprint -> (last use, size in bytes)
+        self._entries: Dict[str, Tuple[float, int]] = {}
+        for file_name in os.listdir(cache_dir):
+            if file_name.endswith(".json"):
+                stat = os.stat(os.path.join(cache_dir, file_name))
+                self._entries[file_name[:-5]] = (stat.st_mtime, stat.st_size)
+
+    def fingerprint(
+        self,
+        command: str,
+        environment: Optional[Dict[str, str]] = None,
+        env_keys: Iterable[str] = (),
+        input_files: Iterable[str] = (),
+    ) -> str:
+        """
+        Computes the cache key of a job.
+
+        :param command: The job's command.
+        :param environment: The job's environment variables.
+        :param env_keys: Extra environment variables relevant to this job.
+        :param input_files: Files whose content the job's outcome depends on.
+            Directories stand for every file below them.
+        :return: Hex digest identifying the job and its inputs.
+        """
+        environment = environment or {}
+        digest = hashlib.sha256()
+        digest.update(command.encode())
+        for key in sorted(set(self.env_keys).union(env_keys)):
+            digest.update(f"\0env:{key}={environment.get(key, '')}".encode())
+        for path in sorted(input_files):
+            if os.path.isdir(path):
+                for file_path in _walk_files(path):
+                    digest.update(
+                        f"\0file:{file_path}={self._hash_file(file_path)}".encode()
+                    )
+            else:
+                digest.update(f"\0file:{path}={self._hash_file(path)}".encode())
+        return digest.hexdigest()
+
+    def _hash_file(self, path: str) -> str:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return "missing"
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            file_hash = self._file_hashes.get(key)
+        if file_hash is None:
+            # Hashed outside the lock; concurrent jobs may hash the same file twice
+            digest = hashlib.sha256()
+            with open(path, "rb") as file:
+                for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+            file_hash = digest.hexdigest()
+            with self._lock:
+                self._file_hashes[key] = file_hash
+        return file_hash
+
+    def _path(self, fingerprint: str) -> str:
+        return os.path.join(self.cache_dir, f"{fingerprint}.json")
+
+    def get(self, fingerprint: str) -> Optional[Dict]:
+        """
+        Looks up a stored result and marks it as recently used.
+
+        :param fingerprint: The job's fingerprint.
+        :return: The stored result record, or None on a miss.
+        """
+        path = self._path(fingerprint)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                record = json.load(file)
+                os.utime(path)
+                stat = os.fstat(file.fileno())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        with self._lock:
+            self._entries[fingerprint] = (stat.st_mtime, stat.st_size)
+        return record
+
+    def put(self, fingerprint: str, record: Dict):
+        """
+        Stores a result record, evicting old entries if the cache is over its limits.
+
+        :param fingerprint: The job's fingerprint.
+        :param record: JSON-serialisable result of the job.
+        """
+        path = self._path(fingerprint)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(record, file)
+            file.flush()
+            stat = os.fstat(file.fileno())
+        os.replace(temp_path, path)
+        with self._lock:
+            self._entries[fingerprint] = (stat.st_mtime, stat.st_size)
+            self._evict()
+
+    def _evict(self):
+        total_bytes = sum(size for _, size in self._entries.values())
+        by_last_use = sorted(self._entries.items(), key=lambda item: item[1][0])
+        for fingerprint, (_, size) in by_last_use:
+            over_entries = (
+                self.max_entries is not None and len(self._entries) > self.max_entries
+            )
+            over_bytes = self.max_bytes is not None and total_bytes > self.max_bytes
+            if not (over_entries or over_bytes):
+                break
+            try:
+                os.remove(self._path(fingerprint))
+            except FileNotFoundError:
+                pass
+            del self._entries[fingerprint]
+            total_bytes -= size
+            logging.debug(f"Evicted cached result {fingerprint}")
+
+
+def _walk_files(directory: str) -> List[str]:
+    # Every file below the directory, in a stable order
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        paths.extend(os.path.join(root, name) for name in sorted(files))
+    return paths
@@ -0,0 +1,251 @@
+import json
+import os
+import shutil
+from array import array
+from itertools import islice
+from typing import IO, TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+if TYPE_CHECKING:
+    from pipeline import JobResult
+
+# Characters of each output stream kept inline in an exported record by default
+DEFAULT_PREVIEW_CHARS = 4096
+EXPORT_BATCH_SIZE = 1000
+OUTPUT_STREAMS = ("stdout", "stderr")
+
+
+def _preview(text: str, max_chars: Optional[int]) -> str:
+    # Keep the tail: failures are usually reported at the end of the output
+    if max_chars is None or len(text) <= max_chars:
+        return text
+    omitted = len(text) - max_chars
+    return f"[... {omitted} characters omitted ...]\n{text[-max_chars:]}"
+
+
+def result_record(
+    result: "JobResult",
+    max_output_chars: Optional[int] = None,
+    blob: Optional[IO[bytes]] = None,
+) -> Dict:
+    """
+    Converts a job result into a flat, JSON-serialisable record.
+
+    With ``blob``, the full output of each stream is appended to it, copied
+    from the spill file if the output was spilled, so that the export outlives
+    the spill files. The location is stored as ``<stream>_file``,
+    ``<stream>_offset`` and ``<stream>_length`` (in bytes), and can be read back
+    with ``read_output``.
+
+    :param result: The job result.
+    :param max_output_chars: Optional number of characters of each stream kept
+        inline; the beginning of longer output is cut off.
+    :param blob: Optional binary file collecting the full output of the jobs.
+    :return: The record.
+    """
+    record = {
+        "stage_name": result.stage_name,
+        "job_name": result.job.name,
+        "command": result.job.command,
+        "stdout": _preview(result.stdout, max_output_chars),
+        "stderr": _preview(result.stderr, max_output_chars),
+        "success": "Yes" if result.success else "No",
+        "execution_time": result.execution_time,
+        "duration": result.duration,
+    }
+    if blob is None:
+        return record
+
+    record["truncated"] = result.truncated
+    for stream in OUTPUT_STREAMS:
+        spill_path = getattr(result, f"{stream}_path")
+        offset = blob.tell()
+        if spill_path is not None and os.path.exists(spill_path):
+            with open(spill_path, "rb") as spill_file:
+                shutil.copyfileobj(spill_file, blob)
+        else:
+            blob.write(getattr(result, stream).encode("utf-8"))
+        record[f"{stream}_file"] = blob.name
+        record[f"{stream}_offset"] = offset
+        record[f"{stream}_length"] = blob.tell() - offset
+    return record
+
+
+def iter_result_records(
+    results: Iterable["JobResult"],
+    max_output_chars: Optional[int] = None,
+    blob: Optional[IO[bytes]] = None,
+) -> Iterator[Dict]:
+    """
+    Lazily converts job results into records, one at a time.
+
+    :param results: The job results.
+    :param max_output_chars: Optional number of characters of each stream kept
+        inline.
+    :param blob: Optional binary file collecting the full output of the jobs.
+    :return: Iterator over the records.
+    """
+    for result in results:
+        yield result_record(result, max_output_chars, blob)
+
+
+def read_output(record: Dict, stream: str = "stdout") -> str:
+    """
+    Reads the full output of a job referenced by an exported record.
+
+    :param record: A record written with a blob file.
+    :param stream: 'stdout' or 'stderr'.
+    :return: The decoded output.
+    """
+    path = record.get(f"{stream}_file")
+    if path is None:
+        return record[stream]
+    with open(path, "rb") as file:
+        file.seek(record[f"{stream}_offset"])
+        data = file.read(record[f"{stream}_length"])
+    return data.decode("utf-8", errors="replace")
+
+
+def write_jsonl(
+    results: Iterable["JobResult"],
+    path: str,
+    max_output_chars: Optional[int] = DEFAULT_PREVIEW_CHARS,
+    blob_path: Optional[str] = None,
+) -> int:
+    """
+    Streams job results to a JSON Lines file, one record per line.
+
+    :param results: The job results.
+    :param path: Path of the JSONL file.
+    :param max_output_chars: Optional number of characters of each stream kept
+        inline.
+    :param blob_path: Optional file receiving the full output of the jobs, which
+        the records reference by offset.
+    :return: Number of records written.
+    """
+    count = 0
+    blob = open(blob_path, "wb") if blob_path else None
+    try:
+        with open(path, "w", encoding="utf-8") as file:
+            for record in iter_result_records(results, max_output_chars, blob):
+                file.write(json.dumps(record) + "\n")
+                count += 1
+    finally:
+        if blob is not None:
+            blob.close()
+    return count
+
+
+def write_arrow(
+    results: Iterable["JobResult"],
+    path: str,
+    file_format: str = "parquet",
+    max_output_chars: Optional[int] = DEFAULT_PREVIEW_CHARS,
+    blob_path: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> int:
+    """
+    Streams job results to a Parquet or Arrow IPC file in record batches, so only
+    ``batch_size`` records are held in memory at a time. Requires ``pyarrow``.
+
+    :param results: The job results.
+    :param path: Path of the output file.
+    :param file_format: 'parquet' or 'arrow'.
+    :param max_output_chars: Optional number of characters of each stream kept
+        inline.
+    :param blob_path: Optional file receiving the full output of the jobs, which
+        the records reference by offset.
+    :param batch_size: Number of records per batch.
+    :return: Number of records written.
+    """
+    if pa is None:
+        raise ImportError("Exporting to Parquet or Arrow requires 'pyarrow'")
+    if file_format not in ("parquet", "arrow"):
+        raise ValueError(f"Unknown export format '{file_format}'")
+
+    fields = [
+        ("stage_name", pa.string()),
+        ("job_name", pa.string()),
+        ("command", pa.string()),
+        ("stdout", pa.large_string()),
+        ("stderr", pa.large_string()),
+        ("success", pa.string()),
+        ("execution_time", pa.string()),
+        ("duration", pa.float64()),
+    ]
+    if blob_path:
+        fields.append(("truncated", pa.bool_()))
+        for stream in OUTPUT_STREAMS:
+            fields += [
+                (f"{stream}_file", pa.string()),
+                (f"{stream}_offset", pa.int64()),
+                (f"{stream}_length", pa.int64()),
+            ]
+    schema = pa.schema(fields)
+
+    count = 0
+    blob = open(blob_path, "wb") if blob_path else None
+    if file_format == "parquet":
+        writer = pq.ParquetWriter(path, schema)
+    else:
+        writer = pa.ipc.new_file(path, schema)
+    try:
+        records = iter_result_records(results, max_output_chars, blob)
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+            count += len(batch)
+    finally:
+        writer.close()
+        if blob is not None:
+            blob.close()
+    return count
+
+
+class JsonlResultReader:
+    def __init__(self, path: str):
+        """
+        Random access to the pages of an exported JSONL results file, e.g. for a
+        paginated Dash table. Only the byte offset of each line is kept in memory.
+
+        :param path: Path of the JSONL file.
+        """
+        self.path = path
+        self._offsets = array("Q")
+        with open(path, "rb") as file:
+            offset = 0
+            for line in file:
+                self._offsets.append(offset)
+                offset += len(line)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def page_count(self, page_size: int) -> int:
+        """
+        Returns the number of pages of ``page_size`` records.
+        """
+        return (len(self) + page_size - 1) // page_size
+
+    def page(self, page: int, page_size: int) -> List[Dict]:
+        """
+        Reads one page of records.
+
+        :param page: Zero-based page number.
+        :param page_size: Number of records per page.
+        :return: The records of the page; empty past the last page.
+        """
+        start = page * page_size
+        if page < 0 or start >= len(self):
+            return []
+        with open(self.path, "rb") as file:
+            file.seek(self._offsets[start])
+            return [json.loads(line) for line in islice(file, page_size)]
@@ -1,4 +1,22 @@
 # command_handler.py
-def handle_command(message):
+import json
+
+from test_executor import cancel_job, execute_job
+
+
+async def handle_command(message):
+    """Handle a message from the server; returns a reply to send back, if any."""
+    try:
+        payload = json.loads(message)
+    except json.JSONDecodeError:
+        payload = None
+    if isinstance(payload, dict) and payload.get("type") == "job":
+        result = await execute_job(payload)
+        return json.dumps(result)
+    if isinstance(payload, dict) and payload.get("type") == "cancel":
+        cancel_job(payload["job_id"])
+        return None
+
     print(f"Command received: {message}")
     # Add logic to handle specific commands, e.g., 'pause', 'resume', 'stop'
+    return None
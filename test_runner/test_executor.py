@@ -1,11 +1,16 @@
 # test_executor.py
 from concurrent.futures import ThreadPoolExecutor
 import asyncio
+import os
+import signal
 
 from utils import log_info
 
 executor = ThreadPoolExecutor(max_workers=5)
 
+# Processes of the pipeline jobs being executed, by job id
+running_jobs = {}
+
 async def execute_test(test_details):
     loop = asyncio.get_running_loop()
     await loop.run_in_executor(executor, run_test, test_details)
@@ -14,3 +19,43 @@ def run_test(test_details):
     log_info(f"Executing test: {test_details['name']}")
     # Simulate test execution logic
     return {"status": "success", "details": "Test completed successfully."}
+
+
+async def execute_job(job_message):
+    """Run a pipeline job sent by the server and build the result message."""
+    log_info(f"Executing job: {job_message['name']}")
+    process = await asyncio.create_subprocess_shell(
+        job_message["command"],
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env={**os.environ, **job_message.get("environment", {})},
+        # Own process group, so that cancelling kills the commands the shell starts
+        start_new_session=os.name != "nt",
+    )
+    running_jobs[job_message["job_id"]] = process
+    try:
+        stdout, stderr = await process.communicate()
+    finally:
+        running_jobs.pop(job_message["job_id"], None)
+    return {
+        "type": "result",
+        "job_id": job_message["job_id"],
+        "stdout": stdout.decode(errors="replace"),
+        "stderr": stderr.decode(errors="replace"),
+        "return_code": process.returncode,
+    }
+
+
+def cancel_job(job_id):
+    """Kill the processes of a running job; its result is still sent back."""
+    process = running_jobs.get(job_id)
+    if process is None or process.returncode is not None:
+        return
+    log_info(f"Cancelling job {job_id}")
+    if os.name == "nt":
+        process.kill()
+        return
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
@@ -5,6 +5,9 @@ import asyncio
 from utils import log_info, log_error
 from config import config
 
+# Keeps references to in-flight command tasks until they finish
+pending_replies = set()
+
 
 async def start_websocket_client(runner_id):
     uri = f"{config.websocket_url}/{runner_id}"
@@ -21,6 +24,18 @@ async def start_websocket_client(runner_id):
 async def listen_to_messages(websocket):
     try:
         async for message in websocket:
-            handle_command(message)
+            # Jobs run concurrently so one long job does not hold up the others
+            task = asyncio.create_task(reply_to_command(websocket, message))
+            pending_replies.add(task)
+            task.add_done_callback(pending_replies.discard)
+    except Exception as e:
+        log_error(f"Error in message handling: {e}")
+
+
+async def reply_to_command(websocket, message):
+    try:
+        reply = await handle_command(message)
+        if reply is not None:
+            await websocket.send(reply)
     except Exception as e:
         log_error(f"Error in message handling: {e}")
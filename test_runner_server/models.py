@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import WebSocket
 from typing import Dict, Optional
 
@@ -14,3 +15,7 @@ active_connections: Dict[int, WebSocket] = {}
 
 # Optional: Dictionary to hold runner metadata if needed for other operations
 runners_details: Dict[int, Runner] = {}
+
+# Messages (e.g. job results) received from each runner, consumed by pipeline executors.
+# None is queued when the runner disconnects.
+incoming_messages: Dict[int, asyncio.Queue] = {}
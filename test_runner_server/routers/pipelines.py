@@ -0,0 +1,85 @@
+import os
+import sys
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from models import active_connections, incoming_messages, runners_details
+
+# The pipeline engine's modules import each other by name
+sys.path.append(
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "regression_testing",
+    )
+)
+
+from distributed_executor import (  # noqa: E402
+    DistributedPipelineExecutor,
+    channels_from_connections,
+)
+from pipeline import Job, Pipeline, PipelineValidationError, Stage  # noqa: E402
+
+router = APIRouter()
+
+
+class JobSpec(BaseModel):
+    name: str
+    command: str
+    environment: Optional[Dict[str, str]] = None
+    requirements: Optional[Dict[str, object]] = None
+
+
+class StageSpec(BaseModel):
+    name: str
+    jobs: List[JobSpec]
+    parallel: bool = False
+    max_parallel: Optional[int] = None
+    weight: int = 1
+    dependencies: List[str] = []
+
+
+class PipelineRun(BaseModel):
+    stages: List[StageSpec]
+    slots_per_runner: int = 1
+    job_timeout: Optional[float] = None
+
+
+@router.post("/run")
+async def run_pipeline(pipeline_run: PipelineRun):
+    """Shard a pipeline's jobs across the connected runners and return the results."""
+    if not active_connections:
+        raise HTTPException(status_code=503, detail="No runner connected")
+    pipeline = Pipeline()
+    for stage_spec in pipeline_run.stages:
+        stage = Stage(
+            stage_spec.name,
+            parallel=stage_spec.parallel,
+            max_parallel=stage_spec.max_parallel,
+            weight=stage_spec.weight,
+        )
+        for job_spec in stage_spec.jobs:
+            stage.add_job(
+                Job(
+                    job_spec.name,
+                    job_spec.command,
+                    environment=job_spec.environment,
+                    requirements=job_spec.requirements,
+                )
+            )
+        pipeline.add_stage(stage, stage_spec.dependencies)
+
+    executor = DistributedPipelineExecutor(
+        pipeline,
+        channels_from_connections(
+            active_connections, runners_details, incoming_messages
+        ),
+        slots_per_runner=pipeline_run.slots_per_runner,
+        job_timeout=pipeline_run.job_timeout,
+    )
+    try:
+        await executor.run()
+    except PipelineValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"results": executor.get_pipeline_results()}
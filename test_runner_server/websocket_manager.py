@@ -1,14 +1,26 @@
+import asyncio
+import json
 from fastapi import WebSocket, WebSocketDisconnect
-from models import active_connections, Runner
+from models import active_connections, incoming_messages, Runner
 
 
 async def websocket_endpoint(websocket: WebSocket, runner_id: int):
     await websocket.accept()
     active_connections[runner_id] = websocket
+    messages = incoming_messages.setdefault(runner_id, asyncio.Queue())
     try:
         while True:
             data = await websocket.receive_text()
             print(f"Received from runner {runner_id}: {data}")  # Log or process data
+            try:
+                message = json.loads(data)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(message, dict) and message.get("type") == "result":
+                await messages.put(message)
     except WebSocketDisconnect:
-        active_connections.pop(runner_id, None)
         print(f"Runner {runner_id} disconnected")
+    finally:
+        # Whatever ended the connection, executors waiting on the runner are told
+        active_connections.pop(runner_id, None)
+        await incoming_messages.pop(runner_id, messages).put(None)